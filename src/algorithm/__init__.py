@@ -1,4 +1,7 @@
-from .init import RandomGenerator
+from .init import RandomGenerator, MarkovGenerator
 # from .fitness import interval_score, variety_score
-from .genetic import GeneticAlgorithm
+from .genetic import GeneticAlgorithm, Snapshot
+from .features import MelodyFeatures
 # from .operation import one_point_mutate
+from .instrument import Instrumentation
+from .similarity import NgramIndex
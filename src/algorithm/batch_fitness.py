@@ -0,0 +1,263 @@
+"""
+Batched counterparts of the functions in `algorithm.fitness`.
+
+Every function here takes a 2-D matrix of note ids with shape `(individuals, length)`
+(e.g. `Population.data`) and returns a `float64` vector with one value per individual.
+The results are exactly the same as calling the scalar version on every row.
+"""
+
+import numpy as np
+from melody import Note, STABILITY, compile_tonality
+from .similarity import NgramIndex
+from typing import List, Tuple
+
+HOLD = Note.NUM + 1
+
+
+def _as_notes(notes: np.ndarray) -> np.ndarray:
+    notes = np.asarray(notes)
+    if notes.ndim != 2:
+        raise ValueError(f"Expected 2-D array of note ids, given shape {notes.shape}")
+    return notes.astype(np.int16)
+
+
+def _sounding(notes: np.ndarray) -> np.ndarray:
+    return (notes >= 1) & (notes <= Note.NUM)
+
+
+def _compact(notes: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Move sounding notes of every row to the front, keeping their order.
+
+    Returns
+    -------
+    `(compact, valid, count)`: the compacted matrix, a mask of meaningful entries in it,
+    and the number of sounding notes in every row.
+    """
+    sounding = _sounding(notes)
+    order = np.argsort(~sounding, axis=1, kind='stable')
+    compact = np.take_along_axis(notes, order, axis=1)
+    count = sounding.sum(axis=1)
+    valid = np.arange(notes.shape[1]) < count[:, None]
+    return compact, valid, count
+
+
+def _interval_values(intervals: np.ndarray) -> np.ndarray:
+    values = np.full(intervals.shape, 0.5)
+    values[np.isin(intervals, [0, 2, 3, 4, 7, 8, 9])] = 1.0
+    values[intervals >= 13] = 0.0
+    return values
+
+
+def _histogram(notes: np.ndarray) -> np.ndarray:
+    """`(individuals, Note.NUM + 2)` count of every note id in every row."""
+    offset = notes + (Note.NUM + 2) * np.arange(len(notes))[:, None]
+    return np.bincount(offset.ravel(), minlength=(Note.NUM + 2) * len(notes)).reshape(
+        len(notes), Note.NUM + 2)
+
+
+# Score functions
+
+
+def interval_score(notes: np.ndarray) -> np.ndarray:
+    notes = _as_notes(notes)
+    if notes.shape[1] <= 1:
+        return np.ones(len(notes))
+    compact, valid, count = _compact(notes)
+    values = _interval_values(np.abs(np.diff(compact, axis=1)))
+    score = np.where(valid[:, 1:], values, 0.0).sum(axis=1)
+    return np.where(count <= 1, 0.0, score / np.maximum(count - 1, 1))
+
+
+def get_tonality(notes: np.ndarray, mode: List[str] | str) -> Tuple[np.ndarray, np.ndarray]:
+    """Batched `melody.get_tonality`.
+
+    Returns
+    -------
+    `(ratio, key)`: the ratio of notes in the best tonality, and the index of that
+    tonality in `compile_tonality(mode).keys` (`-1` where `get_tonality` gives `None`).
+    """
+    notes = _as_notes(notes)
+    masks = compile_tonality(mode).masks
+    histogram = _histogram(notes)
+    histogram[:, [0, HOLD]] = 0
+    counts = histogram @ masks.T
+    best = counts.argmax(axis=1)
+    best_count = counts[np.arange(len(notes)), best]
+    total = histogram.sum(axis=1)
+    ratio = np.where(total > 0, best_count / np.maximum(total, 1), 0.0)
+    return ratio, np.where(best_count > 0, best, -1)
+
+
+def tonality_score(notes: np.ndarray, mode: List[str] | str) -> np.ndarray:
+    return get_tonality(notes, mode)[0]
+
+
+def rhythm_score(notes: np.ndarray) -> np.ndarray:
+    notes = _as_notes(notes)
+    bars = notes.shape[1] // 8
+    if bars == 0:
+        raise ZeroDivisionError("melody shorter than a bar")
+    hold = (notes[:, :bars * 8] == HOLD).reshape(len(notes), bars, 8)
+    diff = (hold[:, 1:] != hold[:, :-1]).sum(axis=(1, 2))
+    return 1 - diff / (8 * bars)
+
+
+def _main_notes(notes: np.ndarray) -> np.ndarray:
+    """Id of the major tonic in octave 4 for every row, `-1` for rows without notes."""
+    keys = compile_tonality('major').keys
+    main_note = np.array([Note(key.split(' ')[0] + '4').id for key in keys])
+    best = get_tonality(notes, mode='major')[1]
+    return np.where(best >= 0, main_note[best], -1)
+
+
+def _stability(notes: np.ndarray, main_note: np.ndarray) -> np.ndarray:
+    return np.asarray(STABILITY)[(notes - main_note[:, None]) % 12]
+
+
+def stable_score(notes: np.ndarray) -> np.ndarray:
+    notes = _as_notes(notes)
+    main_note = _main_notes(notes)
+    compact, valid, _ = _compact(notes)
+    stability = np.where(valid, _stability(compact, main_note), 3)
+
+    # stability of the last note (before the current one) whose stability is not 3
+    index = np.arange(notes.shape[1])
+    last = np.maximum.accumulate(np.where(stability != 3, index, -1), axis=1)
+    rows = np.arange(len(notes))[:, None]
+    last_stability = np.where(last >= 0, stability[rows, np.maximum(last, 0)], -1)
+    last_stability = np.concatenate([np.full((len(notes), 1), -1), last_stability[:, :-1]],
+                                    axis=1)
+    stable = (stability == 0) & (last_stability != 0)
+
+    # distance to the previous stable position
+    previous = np.maximum.accumulate(np.where(stable, index, -1), axis=1)
+    previous = np.concatenate([np.full((len(notes), 1), -1), previous[:, :-1]], axis=1)
+    count = (stable & (previous >= 0) & (index - previous < 4)).sum(axis=1)
+    positions = stable.sum(axis=1)
+
+    score = np.where(positions > 1, count / np.maximum(positions, 1), 0.0)
+    return np.where(main_note >= 0, score, 0.0)
+
+
+def boundary_score(notes: np.ndarray) -> np.ndarray:
+    notes = _as_notes(notes)
+    main_note = _main_notes(notes)
+    compact, _, count = _compact(notes)
+    rows = np.arange(len(notes))
+    first = compact[:, 0]
+    last = compact[rows, np.maximum(count - 1, 0)]
+    score = ((_stability(first[:, None], main_note)[:, 0] == 0).astype(int) +
+             (_stability(last[:, None], main_note)[:, 0] == 0)) / 2
+    return np.where(main_note >= 0, score, 0.0)
+
+
+# Penalty functions
+
+
+def density_penalty(
+        notes: np.ndarray,
+        thresholds: Tuple[float, float, float, float] = (1.0, 0.875, 0.5, 0.3125),
+) -> np.ndarray:
+    notes = _as_notes(notes)
+    density = _sounding(notes).sum(axis=1) / notes.shape[1]
+
+    max_threshold, upper_threshold, lower_threshold, min_threshold = thresholds
+
+    if not 0 <= min_threshold <= lower_threshold < upper_threshold <= max_threshold <= 1:
+        raise ValueError(f"Invalid thresholds: {thresholds}")
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.select(
+            [
+                density > max_threshold,
+                density > upper_threshold,
+                density > lower_threshold,
+                density > min_threshold,
+            ],
+            [
+                1.0,
+                (density - upper_threshold) / (max_threshold - upper_threshold),
+                0.0,
+                (lower_threshold - density) / (lower_threshold - min_threshold),
+            ],
+            default=1.0,
+        )
+
+
+def stop_penalty(notes: np.ndarray) -> np.ndarray:
+    notes = _as_notes(notes)
+    return (notes[:, -1] <= Note.NUM).astype(float)
+
+
+def rest_penalty(notes: np.ndarray) -> np.ndarray:
+    notes = _as_notes(notes)
+    return (notes == 0).any(axis=1).astype(float)
+
+
+def consecutive_penalty(notes: np.ndarray, threshold: int = 8) -> np.ndarray:
+    if not isinstance(threshold, int):
+        raise ValueError(f"Expected threshold: int, given {type(threshold)}")
+    if threshold <= 0:
+        raise ValueError(f"Expected threshold > 0, given {threshold}")
+
+    notes = _as_notes(notes)
+    length = threshold + 1
+    windows = notes.shape[1] - length  # same windows as `fitness.consecutive_penalty`
+    if windows <= 0:
+        return np.zeros(len(notes))
+    prefix = np.concatenate([np.zeros((len(notes), 1), dtype=int),
+                             np.cumsum(_sounding(notes), axis=1)],
+                            axis=1)
+    sums = prefix[:, length:length + windows] - prefix[:, :windows]
+    return (sums == length).any(axis=1).astype(float)
+
+
+def range_penalty(notes: np.ndarray, threshold: int) -> np.ndarray:
+    notes = _as_notes(notes)
+    sounding = _sounding(notes)
+    maxp = np.where(sounding, notes, 0).max(axis=1)
+    minp = np.where(sounding, notes, Note.NUM + 1).min(axis=1)
+    diff = np.where(sounding.any(axis=1), maxp - minp, Note.NUM)
+    return (diff > threshold).astype(float)
+
+
+def variety_penalty(notes: np.ndarray, threshold: int) -> np.ndarray:
+    notes = _as_notes(notes)
+    variety = (_histogram(notes)[:, 1:-1] > 0).sum(axis=1)
+    return (variety < threshold).astype(float)
+
+
+def lonely_penalty(notes: np.ndarray, threshold: int = 9) -> np.ndarray:
+    notes = _as_notes(notes)
+    compact, valid, _ = _compact(notes)
+    jump = np.abs(np.diff(compact, axis=1)) > threshold
+    lonely = jump[:, :-1] & jump[:, 1:] & valid[:, 2:]
+    return lonely.any(axis=1).astype(float)
+
+
+def frequent_penalty(notes: np.ndarray, span: int = 5, occur: int = 3) -> np.ndarray:
+    if span <= 0 or occur <= 0:
+        raise ValueError(f"Expected span > 0 and occur > 0, given {span}, {occur}")
+
+    notes = _as_notes(notes)
+    compact, valid, _ = _compact(notes)
+    # For the first occurrence of a note in a window, count its repetitions in the
+    # window starting there. Some window reaches `occur` iff one of these does.
+    count = np.zeros(compact.shape, dtype=int)
+    for delta in range(min(span, compact.shape[1])):
+        same = compact[:, delta:] == compact[:, :compact.shape[1] - delta]
+        count[:, :compact.shape[1] - delta] += same & valid[:, delta:]
+    return ((count >= occur) & valid).any(axis=1).astype(float)
+
+
+# Reference similarity
+
+
+def similarity_score(notes: np.ndarray, index: NgramIndex) -> np.ndarray:
+    return index.batch_shared_ratio(notes)
+
+
+def copy_penalty(notes: np.ndarray, index: NgramIndex, threshold: int = 8) -> np.ndarray:
+    if not isinstance(threshold, int):
+        raise ValueError(f"Expected threshold: int, given {type(threshold)}")
+    return (index.batch_longest_copy(notes) > threshold).astype(float)
@@ -0,0 +1,187 @@
+"""
+Batched counterparts of the functions in `algorithm.operation`.
+
+Every function works on a 2-D matrix of note ids with shape `(individuals, length)`
+(e.g. `Population.data`) and handles all rows at once with NumPy. Per-row parameters
+(cut points, deltas...) are arrays; when they are not given they are drawn like in
+`algorithm.operation`, from `rng` (by default a generator seeded from `random`).
+
+Mutations modify `notes` in place, only on the given `rows`. Like their scalar versions,
+they never put a prolongation at index 0, never transpose rests or prolongations, and
+keep all notes in `[1, Note.NUM]`.
+"""
+
+import random
+import numpy as np
+from melody import Note
+from typing import Sequence, Tuple
+
+HOLD = Note.NUM + 1
+
+
+def _default_rng(rng: np.random.Generator | None) -> np.random.Generator:
+    return np.random.default_rng(random.getrandbits(64)) if rng is None else rng
+
+
+def random_interval(size: int, length: int,
+                    rng: np.random.Generator | None = None) -> Tuple[np.ndarray, np.ndarray]:
+    """`size` intervals `(left, right)` with `0 <= left <= right <= length`, see `util.random_interval`."""
+    bounds = np.sort(_default_rng(rng).integers(0, length + 1, size=(2, size)), axis=0)
+    return bounds[0], bounds[1]
+
+
+def _region(length: int, start: np.ndarray, stop: np.ndarray) -> np.ndarray:
+    position = np.arange(length)
+    return (position >= np.asarray(start)[:, None]) & (position < np.asarray(stop)[:, None])
+
+
+def one_point_cross(notes: np.ndarray, a: np.ndarray, b: np.ndarray,
+                    index: np.ndarray) -> np.ndarray:
+    """`children[i] = notes[a[i]][:index[i]] + notes[b[i]][index[i]:]`"""
+    notes = np.asarray(notes)
+    return np.where(np.arange(notes.shape[1]) < np.asarray(index)[:, None], notes[a], notes[b])
+
+
+def two_points_cross(notes: np.ndarray, a: np.ndarray, b: np.ndarray, left: np.ndarray,
+                     right: np.ndarray) -> np.ndarray:
+    """`children[i] = notes[a[i]]` with `[left[i], right[i])` taken from `notes[b[i]]`."""
+    notes = np.asarray(notes)
+    return np.where(_region(notes.shape[1], left, right), notes[b], notes[a])
+
+
+def one_point_mutate(
+    notes: np.ndarray,
+    rows: np.ndarray,
+    index: np.ndarray | None = None,
+    values: np.ndarray | None = None,
+    rng: np.random.Generator | None = None,
+) -> None:
+    """Set `notes[rows[i], index[i]] = values[i]`, except prolongations at index 0."""
+    rows = np.asarray(rows, dtype=np.intp)
+    rng = _default_rng(rng)
+    if index is None:
+        index = rng.integers(0, notes.shape[1], size=len(rows))
+    if values is None:
+        values = rng.integers(0, Note.NUM + 2, size=len(rows))
+    index, values = np.asarray(index), np.asarray(values)
+    keep = (values != HOLD) | (index != 0)
+    notes[rows[keep], index[keep]] = values[keep]
+
+
+def _sounding_bounds(notes: np.ndarray, region: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Lowest and highest sounding note of every row in `region`, like `operation.min_note`
+    and `operation.max_note` (`Note.NUM + 1` and `0` if there is none)."""
+    sounding = region & (notes >= 1) & (notes <= Note.NUM)
+    low = np.where(sounding, notes, HOLD).min(axis=1)
+    high = np.where(sounding, notes, 0).max(axis=1)
+    return low.astype(int), high.astype(int)
+
+
+def transpose(
+    notes: np.ndarray,
+    rows: np.ndarray,
+    start: np.ndarray,
+    stop: np.ndarray,
+    delta: np.ndarray | None = None,
+    rng: np.random.Generator | None = None,
+) -> None:
+    """Transpose `notes[rows[i], start[i]:stop[i]]` by `delta[i]`, see `operation.transpose`."""
+    rows = np.asarray(rows, dtype=np.intp)
+    selected = notes[rows].astype(int)
+    region = _region(notes.shape[1], start, stop)
+    if delta is None:
+        low, high = _sounding_bounds(selected, region)
+        delta = _default_rng(rng).integers(1 - low, Note.NUM - high + 1)
+    change = region & (selected >= 1) & (selected <= Note.NUM)
+    result = np.where(change, selected + np.asarray(delta)[:, None], selected)
+    if (result[change] < 1).any() or (result[change] > Note.NUM).any():
+        raise ValueError(f"Transposed notes out of [1, {Note.NUM}]")
+    notes[rows] = result
+
+
+def inverse(
+    notes: np.ndarray,
+    rows: np.ndarray,
+    start: np.ndarray,
+    stop: np.ndarray,
+    s: np.ndarray | None = None,
+    rng: np.random.Generator | None = None,
+) -> None:
+    """Change notes in `notes[rows[i], start[i]:stop[i]]` to `s[i] - note`, see `operation.inverse`."""
+    rows = np.asarray(rows, dtype=np.intp)
+    selected = notes[rows].astype(int)
+    region = _region(notes.shape[1], start, stop)
+    if s is None:
+        low, high = _sounding_bounds(selected, region)
+        s = _default_rng(rng).integers(high + 1, low + Note.NUM + 1)
+    change = region & (selected >= 1) & (selected <= Note.NUM)
+    result = np.where(change, np.asarray(s)[:, None] - selected, selected)
+    if (result[change] < 1).any() or (result[change] > Note.NUM).any():
+        raise ValueError(f"Inversed notes out of [1, {Note.NUM}]")
+    notes[rows] = result
+
+
+def retrograde(notes: np.ndarray, rows: np.ndarray, start: np.ndarray, stop: np.ndarray) -> None:
+    """
+    Reverse the order of notes (with their prolongations) in
+    `notes[rows[i], start[i]:stop[i]]`, see `operation.retrograde`.
+    """
+    rows = np.asarray(rows, dtype=np.intp)
+    start, stop = np.asarray(start), np.asarray(stop)
+    selected = notes[rows]
+    size, length = selected.shape
+    position = np.arange(length)
+    onset = selected != HOLD
+
+    # Like `operation.retrograde`, extend the range so that no note is cut.
+    last_onset = np.maximum.accumulate(np.where(onset, position, -1), axis=1)
+    next_onset = np.minimum.accumulate(np.where(onset, position, length)[:, ::-1], axis=1)[:, ::-1]
+    next_onset = np.concatenate([next_onset, np.full((size, 1), length)], axis=1)
+    row = np.arange(size)
+    empty = start == stop
+    start = np.where(empty, start, last_onset[row, np.minimum(start, length - 1)])
+    stop = np.where(empty, stop, next_onset[row, stop])
+
+    # Group `[group_start, group_end)` of every position: a note and its prolongations.
+    region = _region(length, start, stop)
+    group_start = last_onset
+    group_end = np.minimum(next_onset[:, 1:], stop[:, None])
+    target = start[:, None] + (stop[:, None] - group_end) + (position - group_start)
+    target = np.where(region, target, position)
+    result = np.empty_like(selected)
+    result[row[:, None], target] = selected
+    notes[rows] = result
+
+
+class Breeder:
+    """
+    Builds a whole generation of children at once: `two_points_cross` at random
+    intervals, then, with probability `mutation_rate`, one of `one_point_mutate`,
+    `transpose`, `inverse` and `retrograde` (chosen with probabilities `weights`)
+    at a random interval. Pass it as `breed_function` to `GeneticAlgorithm`.
+    """
+
+    def __init__(
+        self,
+        mutation_rate: float,
+        weights: Sequence[float] = (0.4, 0.2, 0.2, 0.2),
+    ) -> None:
+        if len(weights) != 4 or any(w < 0 for w in weights) or sum(weights) <= 0:
+            raise ValueError(f"Expected 4 non-negative weights, given {weights}")
+        self.mutation_rate = mutation_rate
+        self.weights = np.asarray(weights, dtype=float) / sum(weights)
+
+    def __call__(self, notes: np.ndarray, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        rng = _default_rng(None)
+        length = notes.shape[1]
+        children = two_points_cross(notes, a, b, *random_interval(len(a), length, rng))
+
+        mutated = np.flatnonzero(rng.random(len(a)) < self.mutation_rate)
+        kind = rng.choice(4, size=len(mutated), p=self.weights)
+        one_point_mutate(children, mutated[kind == 0], rng=rng)
+        for k, operation in ((1, transpose), (2, inverse)):
+            rows = mutated[kind == k]
+            operation(children, rows, *random_interval(len(rows), length, rng), rng=rng)
+        rows = mutated[kind == 3]
+        retrograde(children, rows, *random_interval(len(rows), length, rng))
+        return children
@@ -0,0 +1,96 @@
+"""
+Checkpoints of `GeneticAlgorithm`, so that long runs can be resumed after a crash.
+
+A checkpoint is an uncompressed `.npz` file holding the population and the recorded best
+melodies as `uint8` note-id matrices, the state of `random`, and a small JSON header
+(epoch and hyper-parameters). Writing one costs about a copy of the population. Files are
+written to a temporary file first and then renamed, so a crash while writing never
+corrupts the previous checkpoint.
+
+Functions (score, mutation, crossover...) are not saved: build the algorithm with the same
+arguments, then call `GeneticAlgorithm.resume(path)`.
+"""
+
+import os, json, random
+import numpy as np
+from typing import Any, Dict, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .genetic import GeneticAlgorithm
+
+FORMAT_VERSION = 1
+# Not `epoch`: the number of epochs is the one given to the resumed algorithm
+HYPER_PARAMETERS = ('mutation_rate', 'threshold', 'early_stop', 'elitism')
+
+
+class Checkpoint:
+    """State of a `GeneticAlgorithm` at the beginning of epoch `epoch`."""
+    epoch: int
+    population: np.ndarray
+    music: np.ndarray | None
+    random_state: Tuple
+    hyper_parameters: Dict[str, Any]
+
+    def __init__(
+        self,
+        epoch: int,
+        population: np.ndarray,
+        music: np.ndarray | None,
+        random_state: Tuple,
+        hyper_parameters: Dict[str, Any],
+    ) -> None:
+        self.epoch = epoch
+        self.population = population
+        self.music = music
+        self.random_state = random_state
+        self.hyper_parameters = hyper_parameters
+
+
+def save_checkpoint(algorithm: 'GeneticAlgorithm', path: str, epoch: int) -> None:
+    """Save the state of `algorithm` at the beginning of `epoch` to `path`, atomically."""
+    version, internal, gauss_next = random.getstate()
+    header = {
+        'format': FORMAT_VERSION,
+        'epoch': epoch,
+        'random_version': version,
+        'gauss_next': gauss_next,
+        'hyper_parameters': {name: getattr(algorithm, name) for name in HYPER_PARAMETERS},
+    }
+    arrays = {
+        'header': np.array(json.dumps(header)),
+        'population': algorithm.population.data,
+        'random_state': np.array(internal, dtype=np.uint32),
+    }
+    if algorithm.record:
+        music = np.zeros((len(algorithm.music), algorithm.population.length), dtype=np.uint8)
+        for i, melody in enumerate(algorithm.music):
+            music[i] = melody.ids
+        arrays['music'] = music
+
+    temporary = f'{path}.tmp'
+    with open(temporary, 'wb') as file:
+        np.savez(file, **arrays)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+
+
+def load_checkpoint(path: str) -> Checkpoint:
+    """
+    Raises
+    ------
+    `ValueError`
+        if the file is not a checkpoint of a supported version.
+    """
+    with np.load(path, allow_pickle=False) as file:
+        try:
+            header = json.loads(str(file['header']))
+            population = file['population']
+            internal = tuple(int(x) for x in file['random_state'])
+            music = file['music'] if 'music' in file else None
+        except KeyError as error:
+            raise ValueError(f"{path} is not a checkpoint: missing {error}")
+    if header.get('format') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported checkpoint format {header.get('format')} in {path}")
+    random_state = (header['random_version'], internal, header['gauss_next'])
+    return Checkpoint(header['epoch'], population, music, random_state, header['hyper_parameters'])
@@ -0,0 +1,82 @@
+from melody import Melody, Note, get_tonality
+from functools import cached_property
+from typing import List, Tuple, Dict
+
+
+class MelodyFeatures:
+    """
+    Features of a melody shared by the functions in `algorithm.fitness`.
+
+    Every feature is computed on first access and then cached, so a composite
+    evaluator extracts each of them at most once per melody. The features are a
+    snapshot: do not modify the melody while its features are in use.
+    """
+    melody: Melody
+    _tonality: Dict[str | Tuple[str, ...], Tuple[float, str | None]]
+
+    def __init__(self, melody: Melody) -> None:
+        if not isinstance(melody, Melody):
+            melody = Melody(melody)
+        self.melody = melody
+        self._tonality = {}
+
+    @classmethod
+    def of(cls, melody: 'Melody | MelodyFeatures') -> 'MelodyFeatures':
+        """Features of `melody`, or `melody` itself if features are already given."""
+        return melody if isinstance(melody, MelodyFeatures) else cls(melody)
+
+    @cached_property
+    def ids(self) -> List[int]:
+        """Ids of all notes, including rests and holds."""
+        return self.melody.ids
+
+    @cached_property
+    def note_id(self) -> List[int]:
+        """Ids of sounding notes (i.e. no rests and holds), in order."""
+        return [id for id in self.ids if 1 <= id <= Note.NUM]
+
+    @cached_property
+    def rest_mask(self) -> List[bool]:
+        return [id == 0 for id in self.ids]
+
+    @cached_property
+    def hold_mask(self) -> List[bool]:
+        return [id == Note.NUM + 1 for id in self.ids]
+
+    @cached_property
+    def histogram(self) -> List[int]:
+        """Number of occurrences of every note id from `0` to `Note.NUM + 1`."""
+        record = [0] * (Note.NUM + 2)
+        for id in self.ids:
+            record[id] += 1
+        return record
+
+    @cached_property
+    def pitch_class_histogram(self) -> List[int]:
+        """Number of sounding notes of every pitch class, from C(0) to B(11)."""
+        record = [0] * 12
+        for id in self.note_id:
+            record[(id - Note('C4').id) % 12] += 1
+        return record
+
+    @cached_property
+    def note_range(self) -> int:
+        """Difference between the highest and the lowest note, `Note.NUM` if no notes."""
+        if not self.note_id:
+            return Note.NUM
+        return max(self.note_id) - min(self.note_id)
+
+    def tonality(self, mode: List[str] | str = 'major') -> Tuple[float, str | None]:
+        """Cached `melody.get_tonality(melody, mode)`."""
+        key = tuple(mode) if isinstance(mode, list) else mode
+        if key not in self._tonality:
+            self._tonality[key] = get_tonality(self.melody, mode)
+        return self._tonality[key]
+
+    @cached_property
+    def tonic(self) -> int | None:
+        """Id of the tonic (in octave 4) of the major tonality, `None` if no notes."""
+        tonality = self.tonality('major')[1]
+        if tonality is None:
+            return None
+        return Note(tonality.split(' ')[0] + '4').id
@@ -15,16 +15,24 @@ xxx_penalty: Specially punish extremely bad individuals.
 """
 
 from melody import Melody, Note, Tonality, TONALITY, STABILITY, get_stability, get_tonality
+from .features import MelodyFeatures
+from .similarity import NgramIndex
+from util.timer import Timers
 from typing import List, Tuple, Dict, Callable
+import time
+
+# Every function below accepts either a `Melody` or its `MelodyFeatures`.
+# Pass the same `MelodyFeatures` to several functions to share the work between them.
 
 # Score functions
 
 
-def interval_score(melody: Melody) -> float:
-    if len(melody) <= 1:
+def interval_score(melody: Melody | MelodyFeatures) -> float:
+    features = MelodyFeatures.of(melody)
+    if len(features.melody) <= 1:
         return 1.0
     score = 0.0
-    note_id = [note.id for note in melody if 1 <= note.id <= Note.NUM]
+    note_id = features.note_id
     if len(note_id) <= 1:
         return 0
     for i in range(1, len(note_id)):
@@ -44,21 +52,22 @@ def interval_score(melody: Melody) -> float:
 """
 
 
-def tonality_score(melody: Melody, mode: List[str] | str) -> float:
-    return get_tonality(melody, mode)[0]
+def tonality_score(melody: Melody | MelodyFeatures, mode: List[str] | str) -> float:
+    return MelodyFeatures.of(melody).tonality(mode)[0]
 
 
-def rhythm_score(melody: Melody) -> float:
+def rhythm_score(melody: Melody | MelodyFeatures) -> float:
     """This function works bad. Be careful.
     """
 
-    def rhythm_diff(A: List[Note], B: List[Note]) -> int:
-        return sum((a.id == Note.NUM + 1) != (b.id == Note.NUM + 1) for a, b in zip(A, B))
+    def rhythm_diff(A: List[bool], B: List[bool]) -> int:
+        return sum(a != b for a, b in zip(A, B))
 
+    hold_mask = MelodyFeatures.of(melody).hold_mask
     bars = []
     diff = 0
-    for i in range(len(melody) // 8):
-        bars.append(melody[i * 8:(i + 1) * 8])
+    for i in range(len(hold_mask) // 8):
+        bars.append(hold_mask[i * 8:(i + 1) * 8])
     for i in range(1, len(bars)):
         diff += rhythm_diff(bars[i - 1], bars[i])
     ratio = 1 - diff / (8 * len(bars))
@@ -83,13 +92,13 @@ def rhythm_score(melody: Melody) -> float:
 """
 
 
-def stable_score(melody: Melody) -> float:
+def stable_score(melody: Melody | MelodyFeatures) -> float:
+    features = MelodyFeatures.of(melody)
     score = 0.0
-    note_id = [note.id for note in melody if 1 <= note.id <= Note.NUM]
-    tonality = get_tonality(melody, mode='major')[1]
-    if tonality is None:
+    note_id = features.note_id
+    main_note = features.tonic
+    if main_note is None:
         return 0.0
-    main_note = Note(tonality.split(' ')[0] + '4').id
 
     last_stability = -1
     stable_position = []
@@ -119,12 +128,12 @@ def stable_score(melody: Melody) -> float:
 """
 
 
-def boundary_score(melody: Melody) -> float:
-    note_id = [note.id for note in melody if 1 <= note.id <= Note.NUM]
-    tonality = get_tonality(melody, mode='major')[1]
-    if tonality is None:
+def boundary_score(melody: Melody | MelodyFeatures) -> float:
+    features = MelodyFeatures.of(melody)
+    note_id = features.note_id
+    main_note = features.tonic
+    if main_note is None:
         return 0.0
-    main_note = Note(tonality.split(' ')[0] + '4').id
     return ((get_stability(note_id[0], main_note) == 0) +
             (get_stability(note_id[-1], main_note) == 0)) / 2
 
@@ -133,14 +142,14 @@ def boundary_score(melody: Melody) -> float:
 
 
 def density_penalty(
-        melody: Melody,
+        melody: Melody | MelodyFeatures,
         thresholds: Tuple[float, float, float, float] = (1.0, 0.875, 0.5, 0.3125),
 ) -> float:
     """Avoid melody with extremely low/high density.
 
     Parameters
     ----------
-    `melody` : `Melody`
+    `melody` : `Melody | MelodyFeatures`
         melody to evaluate
     `thresholds` : Tuple[float, float, float, float]
         Represents (max_threshold, upper_threshold, lower_threshold, min_threshold).
@@ -154,8 +163,8 @@ def density_penalty(
         1.0 for densities not in range (min_threshold, max_threshold);
         and linear penalty in other ranges.
     """
-    note_num = sum(1 <= note.id <= Note.NUM for note in melody)
-    density = note_num / len(melody)
+    features = MelodyFeatures.of(melody)
+    density = len(features.note_id) / len(features.melody)
 
     max_threshold, upper_threshold, lower_threshold, min_threshold = thresholds
 
@@ -174,12 +183,12 @@ def density_penalty(
         return 1.0
 
 
-def stop_penalty(melody: Melody) -> float:
+def stop_penalty(melody: Melody | MelodyFeatures) -> float:
     """Avoid melody with immediate stop at the end.
 
     Parameters
     ----------
-    `melody` : `Melody`
+    `melody` : `Melody | MelodyFeatures`
         melody to evaluate
     
     Returns
@@ -187,15 +196,15 @@ def stop_penalty(melody: Melody) -> float:
     `float`
         Penalty in [0.0, 1.0]. 1.0 for melodies with a note at the end, and 0.0 for others.
     """
-    return 1.0 if 0 <= melody[-1].id <= Note.NUM else 0.0
+    return 1.0 if 0 <= MelodyFeatures.of(melody).ids[-1] <= Note.NUM else 0.0
 
 
-def rest_penalty(melody: Melody) -> float:
+def rest_penalty(melody: Melody | MelodyFeatures) -> float:
     """Avoid any rest in melody.
     
     Parameters
     ----------
-    `melody` : `Melody`
+    `melody` : `Melody | MelodyFeatures`
         melody to evaluate
     
     Returns
@@ -203,15 +212,15 @@ def rest_penalty(melody: Melody) -> float:
     `float`
         0.0 for melody without rest('0'), 1.0 for others.
     """
-    return 1.0 if any(note.id == 0 for note in melody) else 0.0
+    return 1.0 if MelodyFeatures.of(melody).histogram[0] > 0 else 0.0
 
 
-def consecutive_penalty(melody: Melody, threshold: int = 8) -> float:
+def consecutive_penalty(melody: Melody | MelodyFeatures, threshold: int = 8) -> float:
     """Avoid too many consecutive eight notes (more than a given threshold).
     
     Parameters
     ----------
-    `melody` : `Melody`
+    `melody` : `Melody | MelodyFeatures`
         melody to evaluate
     `threshold` : `int`, optional
         Any melody with more than <threshold> eight notes is unacceptable.
@@ -227,49 +236,38 @@ def consecutive_penalty(melody: Melody, threshold: int = 8) -> float:
     if threshold <= 0:
         raise ValueError(f"Expected threshold > 0, given {threshold}")
 
+    ids = MelodyFeatures.of(melody).ids
     length = threshold + 1
-    for i in range(len(melody) - length):
-        if all(1 <= note.id <= Note.NUM for note in melody[i:i + length]):
+    for i in range(len(ids) - length):
+        if all(1 <= id <= Note.NUM for id in ids[i:i + length]):
             return 1.0
     return 0.0
 
 
-def range_penalty(melody: Melody, threshold: int) -> float:
-
-    def get_range(melody: Melody) -> int:
-        minp, maxp = Note.NUM, 1
-        for note in melody:
-            if note.id != 0 and note.id != Note.NUM + 1:
-                minp = min(minp, note.id)
-                maxp = max(maxp, note.id)
-        diff = maxp - minp
-        return diff if diff >= 0 else Note.NUM
-
-    return 1.0 if get_range(melody) > threshold else 0.0
+def range_penalty(melody: Melody | MelodyFeatures, threshold: int) -> float:
+    return 1.0 if MelodyFeatures.of(melody).note_range > threshold else 0.0
 
 
-def variety_penalty(melody: Melody, threshold: int) -> float:
-    record = [0] * (Note.NUM + 2)
-    for note in melody:
-        record[note.id] = 1
-    variety = sum(record[1:-1])
+def variety_penalty(melody: Melody | MelodyFeatures, threshold: int) -> float:
+    record = MelodyFeatures.of(melody).histogram
+    variety = sum(count > 0 for count in record[1:-1])
     return 1.0 if variety < threshold else 0.0
 
 
-def lonely_penalty(melody: Melody, threshold: int = 9) -> float:
+def lonely_penalty(melody: Melody | MelodyFeatures, threshold: int = 9) -> float:
     """
     Avoid lonely note that change from and to its neighbor notes more than threshold, default 9 (perfect fifth)
     Example: B3 - G4 - A3, then G4 is a lonely note
     """
-    note_id = [note.id for note in melody if 1 <= note.id <= Note.NUM]
+    note_id = MelodyFeatures.of(melody).note_id
     for index in range(1, len(note_id) - 1):
         if (abs(note_id[index] - note_id[index - 1]) > threshold and
                 abs(note_id[index] - note_id[index + 1]) > threshold):
             return 1.0
     return 0.0
 
-def frequent_penalty(melody: Melody, span: int = 5, occur: int = 3):
-    note_id = [note.id for note in melody if 1 <= note.id <= Note.NUM]
+def frequent_penalty(melody: Melody | MelodyFeatures, span: int = 5, occur: int = 3):
+    note_id = MelodyFeatures.of(melody).note_id
     for i in range(len(note_id)):
         record = [0] * (Note.NUM + 2)
         for j in note_id[i:i+span]:
@@ -279,3 +277,102 @@ def frequent_penalty(melody: Melody, span: int = 5, occur: int = 3):
                 return 1.0
     return 0.0
 
+
+# Reference similarity, see `algorithm.similarity`
+
+
+def similarity_score(melody: Melody | MelodyFeatures, index: NgramIndex) -> float:
+    """Reward melodies whose interval/rhythm patterns occur in reference melodies.
+    
+    Parameters
+    ----------
+    `melody` : `Melody | MelodyFeatures`
+        melody to evaluate
+    `index` : `NgramIndex`
+        n-grams of the reference melodies, e.g. `NgramIndex(melodies.all_melody)`
+    
+    Returns
+    -------
+    `float`
+        The fraction of n-grams of the melody found in the references.
+    """
+    return index.shared_ratio(MelodyFeatures.of(melody))
+
+
+def copy_penalty(melody: Melody | MelodyFeatures, index: NgramIndex, threshold: int = 8) -> float:
+    """Avoid copying reference melodies nearly verbatim.
+    
+    Parameters
+    ----------
+    `melody` : `Melody | MelodyFeatures`
+        melody to evaluate
+    `index` : `NgramIndex`
+        n-grams of the reference melodies, e.g. `NgramIndex(melodies.all_melody)`
+    `threshold` : `int`, optional
+        Any melody with a run of more than <threshold> notes (or rests) that may be copied
+        from references is unacceptable.
+        By default `8`.
+    
+    Returns
+    -------
+    `float`
+        1.0 for melody with a longer copied run, 0.0 otherwise.
+    """
+    if not isinstance(threshold, int):
+        raise ValueError(f"Expected threshold: int, given {type(threshold)}")
+    return 1.0 if index.longest_copy(MelodyFeatures.of(melody)) > threshold else 0.0
+
+
+
+# Evaluators
+
+
+class WeightedEvaluator:
+    """
+    Weighted sum of score and penalty functions.
+
+    All functions receive the same `MelodyFeatures`, so the features of a melody are
+    computed only once. Positive weights are for scores and negative ones for penalties.
+    The evaluator is picklable as long as its functions are (e.g. module-level functions
+    or `functools.partial` of them).
+
+    If `timers` is set, the time spent in every component is added to it, by name. As
+    features are shared, it includes features first needed by that component.
+    """
+    terms: Dict[str, Tuple[float, Callable[[MelodyFeatures], float]]]
+    timers: Timers | None = None
+
+    def __init__(self, terms: Dict[str, Tuple[float, Callable[[MelodyFeatures], float]]]) -> None:
+        """
+        Parameters
+        ----------
+        `terms` : `Dict[str, Tuple[float, Callable[[MelodyFeatures], float]]]`
+            Maps the name of every component to `(weight, function)`.
+            Components are summed in the given order.
+        """
+        if not terms:
+            raise ValueError(f"Empty evaluator")
+        self.terms = dict(terms)
+
+    def __call__(self, melody: Melody | MelodyFeatures) -> float:
+        return self.breakdown(melody)[0]
+
+    def breakdown(self, melody: Melody | MelodyFeatures) -> Tuple[float, Dict[str, float]]:
+        """
+        Returns
+        -------
+        `(total, components)`: the weighted sum, and the unweighted value of every component.
+        """
+        features = MelodyFeatures.of(melody)
+        if self.timers is None:
+            components = {name: function(features) for name, (_, function) in self.terms.items()}
+        else:
+            components = {}
+            for name, (_, function) in self.terms.items():
+                start = time.perf_counter()
+                components[name] = function(features)
+                self.timers.add(name, time.perf_counter() - start)
+        total = 0.0
+        for name, (weight, _) in self.terms.items():
+            total += weight * components[name]
+        return total, components
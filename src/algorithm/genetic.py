@@ -1,39 +1,76 @@
 import sys
-from typing import List, Tuple, Callable, Sequence
-from melody import Note, Melody
-import random, math
-from util.selection import RouletteSelection
+from typing import AsyncIterator, Iterator, List, Tuple, Callable, Sequence
+from melody import Note, Melody, Population
+import numpy as np
+import random, math, time, threading
+from util.selection import SelectionStrategy, RouletteStrategy
+from util.cache import LRUCache
+from concurrent.futures import Executor
+from .parallel import ParallelScorer, get_evaluator
+from .instrument import Instrumentation
+from .checkpoint import save_checkpoint, load_checkpoint, HYPER_PARAMETERS
 from .operation import one_point_cross
 
 
+def _positive(score: float) -> float:
+    return score if score > 0.1 else 0.1 * pow(2, score)
+
+
+class Snapshot:
+    """State of a `GeneticAlgorithm` after `epoch` generations, see `GeneticAlgorithm.stream`."""
+    epoch: int
+    best: Melody
+    best_score: float
+    mean_score: float
+
+    def __init__(self, epoch: int, best: Melody, best_score: float, mean_score: float) -> None:
+        self.epoch = epoch
+        self.best = best
+        self.best_score = best_score
+        self.mean_score = mean_score
+
+    def __repr__(self) -> str:
+        return (f"Snapshot(epoch={self.epoch}, best_score={self.best_score}, "
+                f"mean_score={self.mean_score}, best={self.best})")
+
+
 class GeneticAlgorithm:
 
     # Functions
     score_function: Callable[[Melody], float]
+    batch_score_function: Callable[[np.ndarray], np.ndarray] | None
     mutate_function: Callable[[Melody], None]
     cross_function: Callable[[Melody, Melody], Melody]
+    breed_function: Callable[[np.ndarray, np.ndarray, np.ndarray], np.ndarray] | None
 
     # Music
-    population: List[Melody]
+    population: Population
     good_music: List[Tuple[Melody, float]]
 
     # Hyper-parameters
     threshold: float
     mutation_rate: float
     epoch: int
+    selection: SelectionStrategy
+    elitism: int
 
     # Options
     early_stop: bool
+    cache: LRUCache[float] | None
+    parallel_scorer: ParallelScorer | None
+    instrumentation: Instrumentation | None
+    checkpoint: str | None
+    checkpoint_interval: float
 
     # True when there is a good music and self.early_stop
     _end: bool
 
     def __init__(
         self,
-        population: Sequence[Melody | Sequence[int | str | Note]],
+        population: Population | np.ndarray | Sequence[Melody | Sequence[int | str | Note]],
         mutation_rate: float,
         epoch: int,
-        score_function: Callable[[Melody], float],
+        score_function: Callable[[Melody], float] | str,
         mutate_function: Callable[[Melody], None],
         cross_function: Callable[[Melody, Melody], Melody],
         *,
@@ -41,22 +78,33 @@ class GeneticAlgorithm:
         threshold: float = 0.0,
         record: bool = False,
         length: None | int = None,
+        batch_score_function: Callable[[np.ndarray], np.ndarray] | None = None,
+        cache_size: int | None = None,
+        executor: Executor | None = None,
+        chunk_size: int | None = None,
+        selection: SelectionStrategy | None = None,
+        elitism: int = 1,
+        breed_function: Callable[[np.ndarray, np.ndarray, np.ndarray], np.ndarray] | None = None,
+        instrumentation: Instrumentation | None = None,
+        checkpoint: str | None = None,
+        checkpoint_interval: float = 60.0,
     ) -> None:
         """
         constructor of Genetic Algorithm.
         
         Parameters
         ----------
-        `population` : `List[Melody]`
-            Initial population.
+        `population` : `Population | np.ndarray | List[Melody]`
+            Initial population. It is stored as a `Population`, i.e. a `uint8` matrix
+            of note ids, and individuals are converted to `Melody` only when needed.
         `threshold` : `float`
             The threshold for good music.
         `mutation_rate` : `float`
             Mutation probability.
         `epoch` : `int`
             Number of iterations.
-        `score_function` : `Callable[[Melody], float]`
-            Score function.
+        `score_function` : `Callable[[Melody], float] | str`
+            Score function, or its name given to `algorithm.parallel.register_evaluator`.
             See module `algorithm.fitness` for more information.
         `mutate_function` : `Callable[[Melody], None]`
             Mutate function.
@@ -67,43 +115,142 @@ class GeneticAlgorithm:
         `early_stop` : `bool`, optional
             If True, the algorithm will stop immediately when a good music is found.
             By default `False`.
+        `batch_score_function` : `Callable[[np.ndarray], np.ndarray]`, optional
+            Scores a whole generation at once, given the `(individuals, length)` matrix
+            of note ids. Must agree with `score_function`.
+            See module `algorithm.batch_fitness` for more information.
+            By default `None`, i.e. `score_function` is called on every melody.
+        `cache_size` : `int`, optional
+            If given, scores of the last `cache_size` distinct melodies are memoized, so
+            repeated individuals (e.g. the best one, or unmutated children) are not scored
+            again. The score function must be deterministic.
+            By default `None`, i.e. no cache.
+        `executor` : `Executor`, optional
+            If given (e.g. a `ProcessPoolExecutor`), `score_function` is evaluated across
+            its workers, `chunk_size` melodies per task. Ignored when `batch_score_function`
+            is given. See module `algorithm.parallel` for more information.
+            By default `None`, i.e. scores are evaluated serially.
+        `selection` : `SelectionStrategy`, optional
+            How parents are chosen, e.g. `util.TournamentStrategy(3)`.
+            By default `None`, i.e. `util.RouletteStrategy()`.
+        `elitism` : `int`, optional
+            Number of best individuals copied unchanged into the next generation.
+            By default `1`.
+        `breed_function` : `Callable[[np.ndarray, np.ndarray, np.ndarray], np.ndarray]`, optional
+            Builds all children of a generation at once, given the `(individuals, length)`
+            matrix of note ids and the indices of fathers and mothers, e.g.
+            `batch_operation.Breeder(mutation_rate)`. `cross_function`, `mutate_function`
+            and `mutation_rate` are then unused.
+            See module `algorithm.batch_operation` for more information.
+            By default `None`, i.e. children are built one by one.
+        `instrumentation` : `Instrumentation`, optional
+            Times scoring, selection, crossover and mutation, and sends statistics of every
+            epoch to its sinks. See module `algorithm.instrument` for more information.
+            By default `None`, i.e. nothing is measured.
+        `checkpoint` : `str`, optional
+            If given, the state of the run is saved to this file at the beginning of an
+            epoch, at most every `checkpoint_interval` seconds, so that it can be continued
+            with `resume`. See module `algorithm.checkpoint` for more information.
+            By default `None`, i.e. no checkpoint.
+        `checkpoint_interval` : `float`, optional
+            Minimal number of seconds between two checkpoints, `0` for every epoch.
+            By default `60.0`.
         """
-        if not isinstance(population, Sequence):
+        if not isinstance(population, (Population, np.ndarray, Sequence)):
             raise ValueError(f"Expected population: Sequence, given {type(population)}")
-        if not population:
+        if len(population) == 0:
             raise ValueError(f"Empty population")
 
-        if length is None:
-            self.population = [Melody(m) for m in population]
-            if any(len(melody) != len(self.population[0]) for melody in self.population):
-                raise ValueError(f"Inconsistent length for melodies in population, "
-                                 f"given length {[len(m) for m in self.population]}")
+        self.population = Population(population, length=length)
+
+        if executor is None:
+            self.parallel_scorer = None
         else:
-            self.population = [Melody(m).pad_or_cut_to(length) for m in population]
+            self.parallel_scorer = ParallelScorer(executor, score_function, chunk_size)
+        if isinstance(score_function, str):
+            score_function = get_evaluator(score_function)
 
         def _score_function(x: Melody) -> float:
-            score = score_function(x)
-            return score if score > 0.1 else 0.1 * pow(2, score)
+            return _positive(score_function(x))
 
         self.score_function = _score_function
+        self.batch_score_function = batch_score_function
         self.mutate_function = mutate_function
         self.cross_function = cross_function
+        self.breed_function = breed_function
         self.threshold = threshold
         self.mutation_rate = mutation_rate
         self.epoch = epoch
         self.early_stop = early_stop
         self.record = record
+        self.cache = None if cache_size is None else LRUCache(cache_size)
+        if selection is not None and not isinstance(selection, SelectionStrategy):
+            raise ValueError(f"Expected selection: SelectionStrategy, given {type(selection)}")
+        self.selection = RouletteStrategy() if selection is None else selection
+        if not 0 <= elitism <= len(self.population):
+            raise ValueError(f"Expected elitism in [0, {len(self.population)}], given {elitism}")
+        self.elitism = elitism
+        if instrumentation is not None and not isinstance(instrumentation, Instrumentation):
+            raise ValueError(
+                f"Expected instrumentation: Instrumentation, given {type(instrumentation)}")
+        self.instrumentation = instrumentation
+        if checkpoint_interval < 0:
+            raise ValueError(f"Expected checkpoint_interval >= 0, given {checkpoint_interval}")
+        self.checkpoint = checkpoint
+        self.checkpoint_interval = checkpoint_interval
+        self._start_epoch = 0
+        self._last_checkpoint = 0.0
         self._end = False
+        self._stopped = False
+        self._parents: List[int] = []  # drawn by `choose_random` for the current scores
+
+    @property
+    def cache_hits(self) -> int:
+        return 0 if self.cache is None else self.cache.hits
+
+    @property
+    def cache_misses(self) -> int:
+        return 0 if self.cache is None else self.cache.misses
+
+    def _compute_score(self, indices: List[int]) -> List[float]:
+        if self.batch_score_function is not None:
+            scores = self.batch_score_function(self.population.data[indices]).tolist()
+        elif self.parallel_scorer is not None:
+            scores = self.parallel_scorer(self.population.data[indices])
+        else:
+            return [self.score_function(self.population[i]) for i in indices]
+        return [_positive(score) for score in scores]
 
     def _update_score(self) -> None:
-        self.score = [self.score_function(melody) for melody in self.population]
+        if self.instrumentation is not None:
+            start = time.perf_counter()
+        if self.cache is None:
+            self.score = self._compute_score(list(range(len(self.population))))
+        else:
+            keys = [row.tobytes() for row in self.population.data]
+            score = [self.cache.get(key) for key in keys]
+            missing = {}  # first index of every distinct melody not in cache
+            for i, key in enumerate(keys):
+                if score[i] is None:
+                    missing.setdefault(key, i)
+            computed = dict(zip(missing, self._compute_score(list(missing.values()))))
+            for key, value in computed.items():
+                self.cache.put(key, value)
+            self.score = [computed[key] if value is None else value
+                          for key, value in zip(keys, score)]
         self._end = self.early_stop and any(score > self.threshold for score in self.score)
+        self._parents = []
+        if self.instrumentation is not None:
+            self.instrumentation.timers.add('score', time.perf_counter() - start)
 
     def choose_random(self) -> Melody:
-        selector = RouletteSelection(len(self.score))
-        for score in self.score:
-            selector.submit(score)
-        return self.population[selector.selected_index()]
+        """
+        A parent drawn by `selection`. Parents are drawn a generation at a time, so a
+        draw costs O(1) amortized instead of a selection over the whole population.
+        """
+        if not self._parents:
+            self._parents = self.selection.select(self.score, len(self.population)).tolist()
+        return self.population[self._parents.pop()]
 
     def choose_best(self) -> Melody:
         best_id = 0
@@ -112,22 +259,199 @@ class GeneticAlgorithm:
                 best_id = i
         return self.population[best_id]
 
-    def evolve(self) -> None:
+    def top(self, k: int) -> Population:
+        """The `k` best individuals, best first. Scores must be up to date."""
+        order = sorted(range(len(self.score)), key=lambda i: self.score[i], reverse=True)
+        return self.population.take(order[:k])
+
+    def replace_worst(self, melodies: Population) -> None:
+        """
+        Replace the worst individuals by `melodies`. Scores must be up to date, and remain
+        so: only the new individuals are scored.
+        """
+        if len(melodies) > len(self.population):
+            raise ValueError(f"Too many melodies: {len(melodies)} > {len(self.population)}")
+        order = sorted(range(len(self.score)), key=lambda i: self.score[i])[:len(melodies)]
+        self.population.data[order] = melodies.data
+        for i, score in zip(order, self._compute_score(order)):
+            self.score[i] = score
+        self._end = self.early_stop and any(score > self.threshold for score in self.score)
+        self._parents = []
+
+    def _next_generation(self) -> None:
+        new_population = Population.empty(len(self.population), self.population.length)
+        if self.elitism:
+            new_population.data[:self.elitism] = self.top(self.elitism).data
         if self.record:
+            self.music.append(self.choose_best())
+        select, cross, mutate, breed = (self.selection.select, self.cross_function,
+                                        self.mutate_function, self.breed_function)
+        if self.instrumentation is not None:
+            timers = self.instrumentation.timers
+            select, cross = timers.wrap('selection', select), timers.wrap('cross', cross)
+            mutate = timers.wrap('mutate', mutate)
+            if breed is not None:
+                breed = timers.wrap('breed', breed)
+        children = len(self.population) - self.elitism
+        parents = select(self.score, 2 * children)
+        if breed is not None:
+            if children:
+                new_population.data[self.elitism:] = breed(self.population.data, parents[0::2],
+                                                           parents[1::2])
+            self.population = new_population
+            return
+        parents = parents.tolist()
+        for i in range(self.elitism, len(self.population)):
+            father, mother = parents[2 * (i - self.elitism)], parents[2 * (i - self.elitism) + 1]
+            child = cross(self.population[father], self.population[mother])
+            if random.random() < self.mutation_rate:
+                mutate(child)
+            new_population[i] = child
+        self.population = new_population
+
+    def _report(self, epoch: int) -> None:
+        if self.instrumentation is not None:
+            self.instrumentation.record(self, epoch)
+
+    def resume(self, path: str) -> None:
+        """
+        Restore the state saved in checkpoint `path` (population, epoch, state of `random`,
+        hyper-parameters and recorded melodies). The next `evolve` (or `stream`) continues
+        from there, exactly as the interrupted run would have, up to `self.epoch`, which
+        may differ from the one of the interrupted run.
+        """
+        checkpoint = load_checkpoint(path)
+        if checkpoint.epoch > self.epoch:
+            raise ValueError(f"Checkpoint {path} is at epoch {checkpoint.epoch}, "
+                             f"after the last epoch {self.epoch}")
+        self.population = Population(checkpoint.population)
+        for name in HYPER_PARAMETERS:
+            setattr(self, name, checkpoint.hyper_parameters[name])
+        if checkpoint.music is not None:
+            self.record = True
+            self.music = [Melody.from_ids(row) for row in checkpoint.music.tolist()]
+        random.setstate(checkpoint.random_state)
+        self._start_epoch = checkpoint.epoch
+
+    def _begin(self) -> int:
+        """Epoch to start from: `0`, or the one restored by `resume`."""
+        start, self._start_epoch = self._start_epoch, 0
+        if self.record and start == 0:
             self.music = []
-        for epoch in range(self.epoch):
+        self._last_checkpoint = time.monotonic()
+        return start
+
+    def _save_checkpoint(self, epoch: int) -> None:
+        if self.checkpoint is None:
+            return
+        now = time.monotonic()
+        if now - self._last_checkpoint >= self.checkpoint_interval:
+            save_checkpoint(self, self.checkpoint, epoch)
+            self._last_checkpoint = now
+
+    def evolve(self) -> None:
+        start = self._begin()
+        if self.instrumentation is not None:
+            self.instrumentation.start()
+        try:
+            for epoch in range(start, self.epoch):
+                self._save_checkpoint(epoch)
+                self._update_score()
+                self._report(epoch)
+                if self._end:
+                    return
+                self._next_generation()
             self._update_score()
-            if self._end:
-                return
-            new_population = [self.choose_best()]
+            self._report(self.epoch)
             if self.record:
-                self.music += new_population
-            for i in range(1, len(self.population)):
-                child = self.cross_function(self.choose_random(), self.choose_random())
-                if random.random() < self.mutation_rate:
-                    self.mutate_function(child)
-                new_population.append(child)
-            self.population = new_population
-        self._update_score()
-        if self.record:
-            self.music += [self.choose_best()]
+                self.music += [self.choose_best()]
+        finally:
+            if self.instrumentation is not None:
+                self.instrumentation.finish()
+
+    def stop(self) -> None:
+        """Make `stream` (or `astream`) end after the current epoch. Can be called from any thread."""
+        self._stopped = True
+
+    def _snapshot(self, epoch: int) -> Snapshot:
+        best = max(range(len(self.score)), key=self.score.__getitem__)
+        return Snapshot(epoch, self.population[best], self.score[best],
+                        sum(self.score) / len(self.score))
+
+    def stream(self, every: int = 1) -> Iterator[Snapshot]:
+        """
+        Same as `evolve`, but yields a `Snapshot` every `every` epochs (starting from the
+        initial population), and always after the last one. Only the current snapshot is
+        kept, so consumers can preview melodies without storing the whole trajectory.
+
+        The evolution ends early when the generator is closed, or `stop` is called (even
+        before iterating). Then, with `checkpoint`, the current epoch is saved, so that
+        `resume` continues from there.
+        """
+        if every <= 0:
+            raise ValueError(f"Expected every > 0, given {every}")
+        self._stopped = False  # a `stop` from before this call is not for this evolution
+        return self._stream(every)
+
+    def _stream(self, every: int) -> Iterator[Snapshot]:
+        start = self._begin()
+        if self.instrumentation is not None:
+            self.instrumentation.start()
+        epoch = start
+        interrupted = True  # by `stop` or by closing the generator
+        try:
+            for epoch in range(start, self.epoch + 1):
+                if epoch < self.epoch:
+                    self._save_checkpoint(epoch)
+                self._update_score()
+                self._report(epoch)
+                if epoch == self.epoch or self._end:
+                    interrupted = False
+                if self.record and epoch == self.epoch:
+                    self.music += [self.choose_best()]
+                if not interrupted or self._stopped or epoch % every == 0:
+                    yield self._snapshot(epoch)
+                if not interrupted or self._stopped:
+                    return
+                self._next_generation()
+        except Exception:
+            interrupted = False  # the state of a failed epoch is not worth saving
+            raise
+        finally:
+            if interrupted and self.checkpoint is not None:
+                save_checkpoint(self, self.checkpoint, epoch)
+            if self.instrumentation is not None:
+                self.instrumentation.finish()
+
+    async def astream(self, every: int = 1, executor: Executor | None = None) -> AsyncIterator[Snapshot]:
+        """
+        Asynchronous version of `stream`: epochs run in `executor` (by default the loop's
+        default thread pool), so the event loop stays responsive. Leaving the `async for`
+        early (or cancelling it) stops the evolution.
+        """
+        import asyncio  # slow, and only needed by asynchronous callers
+        loop = asyncio.get_running_loop()
+        iterator = self.stream(every)
+        lock = threading.Lock()  # `iterator` is advanced and closed in executor threads
+
+        def advance() -> Snapshot | None:
+            with lock:
+                return next(iterator, None)
+
+        def close() -> None:
+            with lock:
+                iterator.close()
+
+        finished = False
+        try:
+            while True:
+                snapshot = await loop.run_in_executor(executor, advance)
+                if snapshot is None:
+                    finished = True
+                    return
+                yield snapshot
+        finally:
+            if not finished:
+                # Let the epoch in progress (if any) finish, then run the cleanup of `stream`
+                self.stop()
+                await loop.run_in_executor(executor, close)
@@ -0,0 +1,235 @@
+"""
+Incremental evaluation of the windowed components of `algorithm.fitness`.
+
+`IncrementalFitness` keeps partial sums and counters for one melody. After a local change,
+`update` only rescans the changed range plus a few neighbouring notes, instead of the
+whole melody. The operators in `algorithm.operation` return the range they changed:
+
+    state = IncrementalFitness(melody)
+    dirty = operation.one_point_mutate(melody)
+    if dirty is not None:
+        state.update(melody, dirty)
+    state.interval_score()  # == fitness.interval_score(melody)
+
+Every method returns exactly the same value as the function of the same name in
+`algorithm.fitness`.
+"""
+
+from melody import Melody, Note
+from typing import List, Sequence, Tuple
+
+HOLD = Note.NUM + 1
+
+
+def _sounding(ids: Sequence[int]) -> List[int]:
+    return [id for id in ids if 1 <= id <= Note.NUM]
+
+
+def _interval_halves(note_id: Sequence[int]) -> int:
+    """Twice the sum of `interval_score` terms, as an exact integer."""
+    halves = 0
+    for i in range(1, len(note_id)):
+        interval = abs(note_id[i] - note_id[i - 1])
+        if interval >= 13:
+            pass
+        elif interval in [0, 2, 3, 4, 7, 8, 9]:
+            halves += 2
+        else:
+            halves += 1
+    return halves
+
+
+def _lonely_count(note_id: Sequence[int], threshold: int) -> int:
+    return sum(
+        abs(note_id[i] - note_id[i - 1]) > threshold and abs(note_id[i] - note_id[i + 1]) > threshold
+        for i in range(1, len(note_id) - 1))
+
+
+def _frequent_count(note_id: Sequence[int], span: int, occur: int) -> int:
+    count = 0
+    for i in range(len(note_id)):
+        record = [0] * (Note.NUM + 2)
+        for j in note_id[i:i + span]:
+            record[j] += 1
+        count += max(record) >= occur
+    return count
+
+
+class IncrementalFitness:
+    """
+    Cached partial sums of a melody for `interval_score`, `rhythm_score`,
+    `density_penalty`, `stop_penalty`, `rest_penalty`, `consecutive_penalty`,
+    `range_penalty`, `variety_penalty`, `lonely_penalty` and `frequent_penalty`.
+
+    The thresholds of the windowed penalties are fixed at construction.
+    """
+    ids: List[int]
+    histogram: List[int]
+
+    def __init__(
+        self,
+        melody: Melody | Sequence[int],
+        *,
+        consecutive_threshold: int = 8,
+        lonely_threshold: int = 9,
+        span: int = 5,
+        occur: int = 3,
+    ) -> None:
+        if not isinstance(consecutive_threshold, int):
+            raise ValueError(f"Expected threshold: int, given {type(consecutive_threshold)}")
+        if consecutive_threshold <= 0:
+            raise ValueError(f"Expected threshold > 0, given {consecutive_threshold}")
+        if span <= 0 or occur <= 0:
+            raise ValueError(f"Expected span > 0 and occur > 0, given {span}, {occur}")
+        self.consecutive_length = consecutive_threshold + 1
+        self.lonely_threshold = lonely_threshold
+        self.span = span
+        self.occur = occur
+        # number of sounding notes needed on each side of a change
+        self._context = max(span - 1, 2)
+
+        self.ids = melody.ids if isinstance(melody, Melody) else list(melody)
+        self.histogram = [0] * (Note.NUM + 2)
+        for id in self.ids:
+            self.histogram[id] += 1
+        note_id = _sounding(self.ids)
+        self._interval_halves = _interval_halves(note_id)
+        self._lonely = _lonely_count(note_id, self.lonely_threshold)
+        self._frequent = _frequent_count(note_id, self.span, self.occur)
+        self._rhythm = sum(self._bar_diff(b) for b in range(1, len(self.ids) // 8))
+        self._consecutive = sum(
+            self._all_sounding(i) for i in range(len(self.ids) - self.consecutive_length))
+
+    def _bar_diff(self, b: int) -> int:
+        """Number of positions where bars `b - 1` and `b` differ in prolongations."""
+        ids = self.ids
+        return sum((ids[i - 8] == HOLD) != (ids[i] == HOLD) for i in range(b * 8, b * 8 + 8))
+
+    def _all_sounding(self, i: int) -> bool:
+        return all(1 <= id <= Note.NUM for id in self.ids[i:i + self.consecutive_length])
+
+    def _context_range(self, start: int, stop: int) -> Tuple[int, int]:
+        """Extend `[start, stop)` by `self._context` sounding notes on each side."""
+        lo, found = start, 0
+        while lo > 0 and found < self._context:
+            lo -= 1
+            found += 1 <= self.ids[lo] <= Note.NUM
+        hi, found = stop, 0
+        while hi < len(self.ids) and found < self._context:
+            found += 1 <= self.ids[hi] <= Note.NUM
+            hi += 1
+        return lo, hi
+
+    def _windowed(self, start: int, stop: int) -> Tuple[int, int, int, int, int]:
+        """Contributions of all windows touching `[start, stop)`."""
+        lo, hi = self._context_range(start, stop)
+        note_id = _sounding(self.ids[lo:hi])
+        bars = len(self.ids) // 8
+        first_bar, last_bar = max(start // 8, 1), min((stop - 1) // 8 + 1, bars - 1)
+        windows = len(self.ids) - self.consecutive_length
+        first_window = max(start - self.consecutive_length + 1, 0)
+        last_window = min(stop - 1, windows - 1)
+        return (
+            _interval_halves(note_id),
+            _lonely_count(note_id, self.lonely_threshold),
+            _frequent_count(note_id, self.span, self.occur),
+            sum(self._bar_diff(b) for b in range(first_bar, last_bar + 1)),
+            sum(self._all_sounding(i) for i in range(first_window, last_window + 1)),
+        )
+
+    def update(self, melody: Melody | Sequence[int], dirty: Tuple[int, int]) -> None:
+        """
+        Take into account that `melody[dirty[0]:dirty[1]]` has changed (and nothing else).
+        Costs O(window) where the window is the dirty range plus some context.
+        """
+        start, stop = dirty
+        if len(melody) != len(self.ids):
+            raise ValueError(f"Expected melody of length {len(self.ids)}, given {len(melody)}")
+        if not 0 <= start <= stop <= len(self.ids):
+            raise ValueError(f"Invalid dirty range {dirty}")
+        if start == stop:
+            return
+        if isinstance(melody, Melody):
+            new = melody.ids[start:stop]
+        else:
+            new = [note.id if isinstance(note, Note) else note for note in melody[start:stop]]
+
+        old_parts = self._windowed(start, stop)
+        for id in self.ids[start:stop]:
+            self.histogram[id] -= 1
+        self.ids[start:stop] = new
+        for id in new:
+            self.histogram[id] += 1
+        new_parts = self._windowed(start, stop)
+
+        delta = [b - a for a, b in zip(old_parts, new_parts)]
+        self._interval_halves += delta[0]
+        self._lonely += delta[1]
+        self._frequent += delta[2]
+        self._rhythm += delta[3]
+        self._consecutive += delta[4]
+
+    @property
+    def sounding(self) -> int:
+        """Number of sounding notes."""
+        return len(self.ids) - self.histogram[0] - self.histogram[HOLD]
+
+    # Score functions
+
+    def interval_score(self) -> float:
+        if len(self.ids) <= 1:
+            return 1.0
+        if self.sounding <= 1:
+            return 0
+        return self._interval_halves / 2 / (self.sounding - 1)
+
+    def rhythm_score(self) -> float:
+        return 1 - self._rhythm / (8 * (len(self.ids) // 8))
+
+    # Penalty functions
+
+    def density_penalty(
+        self,
+        thresholds: Tuple[float, float, float, float] = (1.0, 0.875, 0.5, 0.3125),
+    ) -> float:
+        density = self.sounding / len(self.ids)
+
+        max_threshold, upper_threshold, lower_threshold, min_threshold = thresholds
+
+        if not 0 <= min_threshold <= lower_threshold < upper_threshold <= max_threshold <= 1:
+            raise ValueError(f"Invalid thresholds: {thresholds}")
+
+        if density > max_threshold:
+            return 1.0
+        elif density > upper_threshold:
+            return (density - upper_threshold) / (max_threshold - upper_threshold)
+        elif density > lower_threshold:
+            return 0.0
+        elif density > min_threshold:
+            return (lower_threshold - density) / (lower_threshold - min_threshold)
+        else:
+            return 1.0
+
+    def stop_penalty(self) -> float:
+        return 1.0 if 0 <= self.ids[-1] <= Note.NUM else 0.0
+
+    def rest_penalty(self) -> float:
+        return 1.0 if self.histogram[0] > 0 else 0.0
+
+    def consecutive_penalty(self) -> float:
+        return 1.0 if self._consecutive > 0 else 0.0
+
+    def range_penalty(self, threshold: int) -> float:
+        present = [id for id in range(1, Note.NUM + 1) if self.histogram[id]]
+        note_range = present[-1] - present[0] if present else Note.NUM
+        return 1.0 if note_range > threshold else 0.0
+
+    def variety_penalty(self, threshold: int) -> float:
+        variety = sum(count > 0 for count in self.histogram[1:-1])
+        return 1.0 if variety < threshold else 0.0
+
+    def lonely_penalty(self) -> float:
+        return 1.0 if self._lonely > 0 else 0.0
+
+    def frequent_penalty(self) -> float:
+        return 1.0 if self._frequent > 0 else 0.0
@@ -1,6 +1,9 @@
-from melody import Melody, Note
+from melody import Melody, Note, compile_tonality, note_ids
 import random
-from typing import Sequence
+import numpy as np
+from typing import Iterable, List, Sequence, Tuple
+
+HOLD = Note.NUM + 1
 
 
 class RandomGenerator:
@@ -15,3 +18,166 @@ class RandomGenerator:
             melody.append(random.choice(self.name_list))
             melody += [Note.NUM + 1] * random.randint(0, 3)
         return Melody(melody[:self.length])
+
+
+def _events(ids: Sequence[int]) -> List[Tuple[int, int]]:
+    """`(note id, duration)` of the sounding notes of a melody. Rests are skipped."""
+    events = []
+    sounding = False  # whether a hold prolongs the last note
+    for id in ids:
+        if 1 <= id <= Note.NUM:
+            events.append([id, 1])
+            sounding = True
+        elif id == HOLD and sounding:
+            events[-1][1] += 1
+        elif id == 0:
+            sounding = False
+    return [(id, duration) for id, duration in events]
+
+
+def _cumulative(counts: np.ndarray) -> np.ndarray:
+    """
+    Cumulative distribution of every row. Rows without counts use the total counts of
+    all rows, or a uniform distribution if there are none at all.
+    """
+    counts = counts.astype(float)
+    total = counts.sum(axis=0)
+    if not total.any():
+        total[:] = 1.0
+    counts[counts.sum(axis=1) == 0] = total
+    cdf = np.cumsum(counts, axis=1)
+    return cdf / cdf[:, -1:]
+
+
+class MarkovGenerator:
+    """
+    Generates melodies like reference melodies, from first-order Markov chains of the
+    intervals between successive notes and of the durations of notes.
+
+        generator = MarkovGenerator(melodies.all_melody, 32, key='C major')
+        generator()              # a `Melody`
+        generator.sample(1000)   # a (1000, 32) matrix of note ids, for `GeneticAlgorithm`
+
+    Generated melodies have no rests. Notes leaving `[F3, G5]` are moved by an octave,
+    and with `key`, notes out of the key are moved to the nearest note in it.
+    """
+    MAX_INTERVAL = 12  # larger intervals are clipped
+    MAX_DURATION = 8  # longer notes are clipped, in eighth notes
+    length: int
+    key: str | None
+    start: np.ndarray
+    intervals: np.ndarray
+    durations: np.ndarray
+    snap: np.ndarray
+
+    def __init__(
+        self,
+        references: Iterable[Melody | Sequence[Note | int | str] | np.ndarray],
+        length: int = 32,
+        *,
+        key: str | None = None,
+        smoothing: float = 0.0,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        `references` : `Iterable[Melody]`
+            Melodies to learn from, e.g. `melodies.all_melody` or a `Corpus`. Arrays of
+            note ids are accepted too.
+        `length` : `int`, optional
+            Length of generated melodies.
+            By default `32`.
+        `key` : `str`, optional
+            A tonality such as `'C major'` or `'A minor'` (see `get_tonality`) that all
+            notes must belong to.
+            By default `None`, i.e. any note.
+        `smoothing` : `float`, optional
+            Added to the count of every transition, so that unseen transitions remain
+            possible.
+            By default `0.0`.
+        """
+        if not isinstance(length, int) or length <= 0:
+            raise ValueError(f"Expected length: int > 0, given {length}")
+        if smoothing < 0:
+            raise ValueError(f"Expected smoothing >= 0, given {smoothing}")
+        self.length = length
+        self.key = key
+
+        intervals = 2 * self.MAX_INTERVAL + 1
+        start = np.zeros(Note.NUM + 1)
+        # The last row counts the first transition of every melody
+        interval_counts = np.full((intervals + 1, intervals), smoothing)
+        duration_counts = np.full((self.MAX_DURATION + 1, self.MAX_DURATION), smoothing)
+        for reference in references:
+            events = _events(note_ids(reference))
+            if not events:
+                continue
+            start[events[0][0]] += 1
+            previous_interval, previous_duration = intervals, self.MAX_DURATION
+            for i, (id, duration) in enumerate(events):
+                duration = min(duration, self.MAX_DURATION) - 1
+                duration_counts[previous_duration, duration] += 1
+                previous_duration = duration
+                if i > 0:
+                    interval = min(max(id - events[i - 1][0], -self.MAX_INTERVAL),
+                                   self.MAX_INTERVAL) + self.MAX_INTERVAL
+                    interval_counts[previous_interval, interval] += 1
+                    previous_interval = interval
+        if not start.any():
+            raise ValueError(f"Expected references with notes")
+
+        self.snap = np.arange(Note.NUM + 1)
+        if key is not None:
+            tonality = compile_tonality(key)
+            if len(tonality.keys) != 1:
+                raise ValueError(f"Expected key such as 'C major', given {key}")
+            notes = np.flatnonzero(tonality.masks[0][1:Note.NUM + 1]) + 1
+            # Nearest note of the key, the higher one on ties
+            ids = np.arange(Note.NUM + 1)[:, None]
+            distance = 2 * np.abs(ids - notes[None, :]) + (notes[None, :] < ids)
+            self.snap = notes[distance.argmin(axis=1)]
+            self.snap[0] = 0
+            start = np.bincount(self.snap[1:], weights=start[1:], minlength=Note.NUM + 1)
+        self.start = np.cumsum(start) / start.sum()
+        self.intervals = _cumulative(interval_counts)
+        self.durations = _cumulative(duration_counts)
+
+    @staticmethod
+    def _draw(cdf: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        """One sample of the distribution of every row of `cdf`."""
+        u = rng.random(len(cdf))
+        return np.minimum((u[:, None] >= cdf).sum(axis=1), cdf.shape[1] - 1)
+
+    def sample(self, count: int, rng: np.random.Generator | None = None) -> np.ndarray:
+        """
+        `count` melodies as a `(count, length)` `uint8` matrix of note ids.
+
+        Parameters
+        ----------
+        `count` : `int`
+            Number of melodies.
+        `rng` : `np.random.Generator`, optional
+            By default `None`, i.e. seeded from `random`, so `random.seed` makes the result
+            reproducible.
+        """
+        rng = np.random.default_rng(random.getrandbits(64)) if rng is None else rng
+        notes = np.full((count, self.length), HOLD, dtype=np.uint8)
+        rows = np.arange(count)
+        position = np.zeros(count, dtype=np.int64)
+        interval = np.full(count, len(self.intervals) - 1)
+        duration = np.full(count, len(self.durations) - 1)
+        pitch = self._draw(np.broadcast_to(self.start, (count, len(self.start))), rng)
+        while True:
+            duration = self._draw(self.durations[duration], rng)
+            alive = position < self.length
+            notes[rows[alive], position[alive]] = pitch[alive]
+            position += duration + 1
+            if (position >= self.length).all():
+                return notes
+            interval = self._draw(self.intervals[interval], rng)
+            pitch = pitch + interval - self.MAX_INTERVAL
+            pitch = np.where(pitch < 1, pitch + 12, np.where(pitch > Note.NUM, pitch - 12, pitch))
+            pitch = self.snap[pitch]
+
+    def __call__(self) -> Melody:
+        return Melody.from_ids(self.sample(1)[0].tolist())
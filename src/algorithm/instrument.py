@@ -0,0 +1,154 @@
+"""
+Instrumentation of `GeneticAlgorithm`: pass `instrumentation=Instrumentation(sinks)`.
+
+After the scores of every epoch are computed, a record is sent to every sink (any
+callable taking a dict, e.g. `MemorySink`, `JsonlSink` or a user callback):
+
+    {
+        'epoch': 3,
+        'best': 2.1, 'mean': 1.4, 'worst': 0.2,  # scores as seen by the algorithm
+        'diversity': 0.9,  # fraction of distinct melodies
+        'distance': 0.6,   # mean fraction of notes differing from the best melody
+        'cache_hits': 12, 'cache_misses': 4,
+        'seconds': {'score': 0.01, 'selection': 0.001, 'cross': 0.002, 'mutate': 0.001},
+        'calls': {'score': 1, 'selection': 1, 'cross': 9, 'mutate': 2},
+        'components': {'interval': 0.004, ...},  # only with `evaluator`
+    }
+
+`seconds` and `calls` cover the work done since the previous record. Without
+instrumentation, `GeneticAlgorithm` only pays for a few `is None` checks per epoch.
+"""
+
+import json
+import numpy as np
+from typing import Any, Callable, Dict, IO, List, Sequence, TYPE_CHECKING
+from util.timer import Timers
+from .fitness import WeightedEvaluator
+
+if TYPE_CHECKING:
+    from .genetic import GeneticAlgorithm
+
+Record = Dict[str, Any]
+
+
+class MemorySink:
+    """Keeps all records in `records`."""
+
+    def __init__(self) -> None:
+        self.records: List[Record] = []
+
+    def __call__(self, record: Record) -> None:
+        self.records.append(record)
+
+
+class JsonlSink:
+    """Writes every record as one line of JSON, flushed immediately."""
+
+    def __init__(self, file: str | IO[str], mode: str = 'w') -> None:
+        """
+        Parameters
+        ----------
+        `file` : `str | IO[str]`
+            Path of the metrics file, or an open text file (not closed by the sink).
+        `mode` : `str`, optional
+            `'w'` to overwrite or `'a'` to append, if `file` is a path.
+            By default `'w'`.
+        """
+        self._owned = isinstance(file, str)
+        self.file = open(file, mode) if isinstance(file, str) else file
+
+    def __call__(self, record: Record) -> None:
+        self.file.write(json.dumps(record) + '\n')
+        self.file.flush()
+
+    def close(self) -> None:
+        if self._owned:
+            self.file.close()
+
+    def __enter__(self) -> 'JsonlSink':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class Instrumentation:
+    """
+    Timers and per-epoch statistics of a `GeneticAlgorithm`, sent to `sinks`.
+    `totals` and `component_totals` accumulate the timers over the whole run.
+    """
+    sinks: List[Callable[[Record], None]]
+    timers: Timers
+    totals: Timers
+    component_totals: Timers
+    evaluator: WeightedEvaluator | None
+    statistics: bool
+
+    def __init__(
+        self,
+        sinks: Sequence[Callable[[Record], None]] = (),
+        *,
+        evaluator: WeightedEvaluator | None = None,
+        statistics: bool = True,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        `sinks` : `Sequence[Callable[[Dict[str, Any]], None]]`
+            Receive the record of every epoch.
+        `evaluator` : `WeightedEvaluator`, optional
+            If given, the time spent in each of its components is recorded. Only melodies
+            scored by it in this process count (not `batch_score_function` nor `executor`).
+            By default `None`.
+        `statistics` : `bool`, optional
+            Whether to compute diversity statistics, which cost O(individuals * length).
+            By default `True`.
+        """
+        if evaluator is not None and not isinstance(evaluator, WeightedEvaluator):
+            raise ValueError(f"Expected evaluator: WeightedEvaluator, given {type(evaluator)}")
+        self.sinks = list(sinks)
+        self.timers = Timers()
+        self.totals = Timers()
+        self.component_totals = Timers()
+        self.evaluator = evaluator
+        self.statistics = statistics
+        self._components = Timers()
+
+    def start(self) -> None:
+        """Called by `GeneticAlgorithm` when evolution starts."""
+        if self.evaluator is not None:
+            self.evaluator.timers = self._components
+
+    def finish(self) -> None:
+        """Called by `GeneticAlgorithm` when evolution ends."""
+        if self.evaluator is not None:
+            self.evaluator.timers = None
+
+    def record(self, algorithm: 'GeneticAlgorithm', epoch: int) -> None:
+        """Send the record of `epoch` to all sinks, then reset the per-epoch timers."""
+        score = algorithm.score
+        record: Record = {
+            'epoch': epoch,
+            'best': max(score),
+            'mean': sum(score) / len(score),
+            'worst': min(score),
+        }
+        if self.statistics:
+            data = algorithm.population.data
+            best = data[max(range(len(score)), key=score.__getitem__)]
+            record['diversity'] = len(np.unique(data, axis=0)) / len(data)
+            record['distance'] = float((data != best).mean())
+        if algorithm.cache is not None:
+            record['cache_hits'] = algorithm.cache.hits
+            record['cache_misses'] = algorithm.cache.misses
+        record['seconds'] = dict(self.timers.seconds)
+        record['calls'] = dict(self.timers.calls)
+        if self.evaluator is not None:
+            record['components'] = dict(self._components.seconds)
+        for sink in self.sinks:
+            sink(record)
+
+        self.totals.merge(self.timers)
+        self.component_totals.merge(self._components)
+        self.timers.clear()
+        self._components.clear()
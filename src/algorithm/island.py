@@ -0,0 +1,164 @@
+"""
+Island model: several `GeneticAlgorithm` instances ("islands") evolve in separate
+processes, and every `migration_interval` epochs each island sends copies of its best
+melodies to its neighbours, which replace their worst individuals.
+"""
+
+import random
+import multiprocessing as mp
+import numpy as np
+from multiprocessing.connection import Connection
+from melody import Melody, Population
+from typing import Any, Dict, List, Sequence, Tuple
+from .genetic import GeneticAlgorithm
+
+TOPOLOGIES = ('ring', 'full')
+
+
+def _island_worker(config: Dict[str, Any], seed: int, connection: Connection) -> None:
+    try:
+        random.seed(seed)
+        algorithm = GeneticAlgorithm(**config)
+        algorithm._update_score()
+        while True:
+            message = connection.recv()
+            if message is None:
+                break
+            epochs, migration_size, immigrants = message
+            if immigrants is not None:
+                algorithm.replace_worst(Population(immigrants))
+            # Scores are up to date at the beginning of every interval
+            for _ in range(epochs):
+                algorithm._next_generation()
+                algorithm._update_score()
+            emigrants = algorithm.top(max(migration_size, 1))
+            connection.send((emigrants.data, max(algorithm.score)))
+    except Exception as error:
+        connection.send(error)
+    finally:
+        connection.close()
+
+
+class IslandModel:
+    """
+    Runs one `GeneticAlgorithm` per island, each in its own process.
+
+    Every island has its own keyword arguments for `GeneticAlgorithm` (population,
+    operators, hyper-parameters...), which must be picklable: use module-level functions
+    (e.g. `operation.random_two_points_cross`) or names given to
+    `algorithm.parallel.register_evaluator`.
+    """
+    islands: List[Dict[str, Any]]
+    epoch: int
+    migration_interval: int
+    migration_size: int
+    topology: str
+
+    # Results: best melody ever seen, its score (as seen by `GeneticAlgorithm`),
+    # and the best score of every island after every migration interval
+    best: Melody | None
+    best_score: float
+    history: List[List[float]]
+
+    def __init__(
+        self,
+        islands: Sequence[Dict[str, Any]],
+        epoch: int,
+        *,
+        migration_interval: int = 10,
+        migration_size: int = 1,
+        topology: str = 'ring',
+        seed: int | None = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        `islands` : `Sequence[Dict[str, Any]]`
+            Keyword arguments of `GeneticAlgorithm` for every island. `epoch` is ignored.
+        `epoch` : `int`
+            Total number of iterations of every island.
+        `migration_interval` : `int`, optional
+            Number of epochs between two migrations.
+            By default `10`.
+        `migration_size` : `int`, optional
+            Number of best melodies sent by every island at every migration.
+            By default `1`.
+        `topology` : `str`, optional
+            `'ring'`: island `i` sends to island `i + 1`;
+            `'full'`: every island sends to every other island.
+            By default `'ring'`.
+        `seed` : `int`, optional
+            Seed of the random generators of the islands.
+            By default `None`, i.e. drawn from `random`.
+        """
+        if not islands:
+            raise ValueError(f"Empty islands")
+        if topology not in TOPOLOGIES:
+            raise ValueError(f"Unknown topology {topology}, expected one of {TOPOLOGIES}")
+        if migration_interval <= 0:
+            raise ValueError(f"Expected migration_interval > 0, given {migration_interval}")
+        if migration_size < 0:
+            raise ValueError(f"Expected migration_size >= 0, given {migration_size}")
+
+        self.islands = [dict(config, epoch=migration_interval) for config in islands]
+        self.epoch = epoch
+        self.migration_interval = migration_interval
+        self.migration_size = migration_size
+        self.topology = topology
+        self.seed = random.getrandbits(32) if seed is None else seed
+        self.best = None
+        self.best_score = float('-inf')
+        self.history = []
+
+    def _migrate(self, emigrants: List[np.ndarray]) -> List[np.ndarray | None]:
+        if self.migration_size == 0 or len(emigrants) == 1:
+            return [None] * len(emigrants)
+        n = len(emigrants)
+        if self.topology == 'ring':
+            return [emigrants[(i - 1) % n][:self.migration_size] for i in range(n)]
+        return [
+            np.concatenate([emigrants[j][:self.migration_size] for j in range(n) if j != i])
+            for i in range(n)
+        ]
+
+    def evolve(self) -> None:
+        connections: List[Connection] = []
+        processes: List[mp.Process] = []
+        try:
+            for i, config in enumerate(self.islands):
+                parent, child = mp.Pipe()
+                process = mp.Process(target=_island_worker,
+                                     args=(config, self.seed + i, child),
+                                     daemon=True)
+                process.start()
+                child.close()
+                connections.append(parent)
+                processes.append(process)
+
+            immigrants: List[np.ndarray | None] = [None] * len(connections)
+            done = 0
+            while done < self.epoch:
+                epochs = min(self.migration_interval, self.epoch - done)
+                for connection, melodies in zip(connections, immigrants):
+                    connection.send((epochs, self.migration_size, melodies))
+                results: List[Tuple[np.ndarray, float]] = [c.recv() for c in connections]
+                for result in results:
+                    if isinstance(result, Exception):
+                        raise result
+                done += epochs
+
+                self.history.append([score for _, score in results])
+                for emigrants, score in results:
+                    if score > self.best_score:
+                        self.best, self.best_score = Melody.from_ids(emigrants[0].tolist()), score
+                immigrants = self._migrate([emigrants for emigrants, _ in results])
+
+            for connection in connections:
+                connection.send(None)
+        finally:
+            for connection in connections:
+                connection.close()
+            for process in processes:
+                process.join(timeout=1)
+                if process.is_alive():
+                    process.terminate()
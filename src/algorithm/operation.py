@@ -23,7 +23,8 @@ def one_point_cross(a: Melody, b: Melody, index: int) -> Melody:
         raise ValueError(f"expected Melody: a/b, given {type(a), type(b)}")
     if not isinstance(index, int):
         raise ValueError(f"expected int: index, given {type(index)}")
-    return Melody(a[:index] + b[index:])
+    a, b = a.ids, b.ids
+    return Melody.from_ids(a[:index] + b[index:])
 
 
 def two_points_cross(a: Melody, b: Melody, indices: Tuple[int, int]) -> Melody:
@@ -46,7 +47,17 @@ def two_points_cross(a: Melody, b: Melody, indices: Tuple[int, int]) -> Melody:
     left, right = indices
     if not isinstance(left, int) or not isinstance(right, int):
         raise ValueError(f"expected ints: indices, given {type(left), type(right)}")
-    return Melody(a[:left] + b[left:right] + a[right:])
+    a, b = a.ids, b.ids
+    return Melody.from_ids(a[:left] + b[left:right] + a[right:])
+
+
+def random_two_points_cross(a: Melody, b: Melody) -> Melody:
+    """
+    ### Brief
+    `two_points_cross` at a random interval (see `util.random_interval`).
+    Unlike a lambda, this function can be sent to other processes.
+    """
+    return two_points_cross(a, b, util.random_interval(len(a)))
 
 
 def one_point_mutate(
@@ -54,12 +65,18 @@ def one_point_mutate(
     index: Optional[int] = None,
     *,
     note_list: Sequence = Note.NAME_LIST,
-) -> None:
+) -> Tuple[int, int] | None:
+    """
+    Replace `melody[index]` by a random note of `note_list`.
+    Returns the changed range `(index, index + 1)`, or `None` if nothing changed.
+    """
     if index is None:
         index = random.randint(0, len(melody) - 1)
-    note = Note(random.choice(note_list))
+    note = Note.of(random.choice(note_list))
     if note.id != Note.NUM + 1 or index != 0:
         melody[index] = note
+        return index % len(melody), index % len(melody) + 1
+    return None
 
 
 def max_note(melody: Melody | List[Note]) -> int:
@@ -82,10 +99,11 @@ def transpose(
     melody: Melody,
     delta: None | int = None,
     indices: None | Tuple[int, int | None] = None,
-) -> None:
+) -> Tuple[int, int]:
     """
     Transpose `melody[indices[0]:indices[1]]` by `delta`.
     If not given, `delta` will be selected randomly among all valid values.
+    Returns the changed range `(start, stop)`.
     """
     if indices is None:
         indices = util.random_interval(len(melody))
@@ -96,19 +114,25 @@ def transpose(
     for note in notes:
         if note.id not in [0, Note.NUM + 1]:
             note.id += delta
+    start, stop, _ = slice(start, stop).indices(len(melody))
+    return start, max(start, stop)
 
 
 def retrograde(
     melody: Melody,
     indices: None | Tuple[int, int | None] = None,
-) -> None:
+) -> Tuple[int, int] | None:
+    """
+    Reverse the order of notes (with their prolongations) in `melody[indices[0]:indices[1]]`.
+    Returns the changed range `(start, stop)`, or `None` if nothing changed.
+    """
     if indices is None:
         indices = util.random_interval(len(melody))
     start, stop = indices
     if stop is None:
         stop = len(melody) - 1
     if start == stop:
-        return
+        return None
     while melody[start].id == Note.NUM + 1:
         start -= 1
     while stop < len(melody) and melody[stop].id == Note.NUM + 1:
@@ -126,16 +150,18 @@ def retrograde(
         i = j
 
     melody[start:stop] = new_notes
+    return start, stop
 
 
 def inverse(
     melody: Melody,
     s: Optional[int] = None,
     indices: None | Tuple[int, int | None] = None,
-) -> None:
+) -> Tuple[int, int]:
     """
     Inverse `melody[indices[0]:indices[1]]` by changing `note` to `Note(s - note.id)`.
     If not given, `s` will be selected randomly among all valid values.
+    Returns the changed range `(start, stop)`.
     """
     if indices is None:
         indices = util.random_interval(len(melody))
@@ -146,3 +172,5 @@ def inverse(
     for note in notes:
         if note.id not in [0, Note.NUM + 1]:
             note.id = s - note.id
+    start, stop, _ = slice(start, stop).indices(len(melody))
+    return start, max(start, stop)
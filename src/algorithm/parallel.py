@@ -0,0 +1,102 @@
+"""
+Score melodies across the processes of an executor.
+
+Melodies are sent to workers as raw bytes of note ids, and the score function is sent
+either by reference (module-level functions, `functools.partial` of them, or
+`fitness.WeightedEvaluator`), or by name for functions that can not be pickled
+(lambdas, closures), after registering them with `register_evaluator` at module level.
+"""
+
+import os, math, pickle
+import numpy as np
+from concurrent.futures import Executor, ProcessPoolExecutor
+from melody import Melody
+from typing import Callable, Dict, List
+
+_EVALUATORS: Dict[str, Callable[[Melody], float]] = {}
+
+
+def register_evaluator(name: str, function: Callable[[Melody], float] | None = None):
+    """
+    Register `function` under `name`, so that workers can find it by name.
+    Can also be used as a decorator: `@register_evaluator('my-evaluator')`.
+
+    Registration must happen when the module is imported (i.e. not under
+    `if __name__ == '__main__'`), so that worker processes register it too.
+    """
+    if not isinstance(name, str):
+        raise ValueError(f"Expected name: str, given {type(name)}")
+
+    def decorator(function: Callable[[Melody], float]) -> Callable[[Melody], float]:
+        _EVALUATORS[name] = function
+        return function
+
+    return decorator if function is None else decorator(function)
+
+
+def get_evaluator(name: str) -> Callable[[Melody], float]:
+    try:
+        return _EVALUATORS[name]
+    except KeyError:
+        raise ValueError(f"Unknown evaluator {name}, registered: {list(_EVALUATORS)}")
+
+
+def _score_chunk(evaluator: str | Callable[[Melody], float], length: int,
+                 data: bytes) -> List[float]:
+    function = get_evaluator(evaluator) if isinstance(evaluator, str) else evaluator
+    return [function(Melody.from_ids(data[i:i + length])) for i in range(0, len(data), length)]
+
+
+class ParallelScorer:
+    """
+    Scores every row of a note-id matrix with `evaluator`, in chunks submitted to
+    `executor`. The result is in the order of rows, so it is the same as scoring
+    serially as long as the evaluator is deterministic.
+    """
+    executor: Executor
+    evaluator: str | Callable[[Melody], float]
+    chunk_size: int | None
+
+    def __init__(
+        self,
+        executor: Executor,
+        evaluator: str | Callable[[Melody], float],
+        chunk_size: int | None = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        `executor` : `Executor`
+            e.g. a `ProcessPoolExecutor`. It is not shut down by the scorer.
+        `evaluator` : `str | Callable[[Melody], float]`
+            The score function, or its name given to `register_evaluator`.
+        `chunk_size` : `int`, optional
+            Number of melodies per task.
+            By default `None`, i.e. about 4 tasks per CPU.
+        """
+        if not isinstance(executor, Executor):
+            raise ValueError(f"Expected executor: Executor, given {type(executor)}")
+        if isinstance(evaluator, str):
+            get_evaluator(evaluator)
+        elif isinstance(executor, ProcessPoolExecutor):
+            try:
+                pickle.dumps(evaluator)
+            except (pickle.PicklingError, AttributeError, TypeError):
+                raise ValueError(f"Evaluator {evaluator} can not be sent to other processes, "
+                                 f"register it with `register_evaluator` and pass its name")
+        if chunk_size is not None and chunk_size <= 0:
+            raise ValueError(f"Expected chunk_size > 0, given {chunk_size}")
+        self.executor = executor
+        self.evaluator = evaluator
+        self.chunk_size = chunk_size
+
+    def __call__(self, notes: np.ndarray) -> List[float]:
+        notes = np.ascontiguousarray(notes, dtype=np.uint8)
+        size, length = notes.shape
+        chunk_size = self.chunk_size or max(1, math.ceil(size / (4 * (os.cpu_count() or 1))))
+        futures = [
+            self.executor.submit(_score_chunk, self.evaluator, length,
+                                 notes[i:i + chunk_size].tobytes())
+            for i in range(0, size, chunk_size)
+        ]
+        return [score for future in futures for score in future.result()]
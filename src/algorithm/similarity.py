@@ -0,0 +1,202 @@
+"""
+Similarity of melodies to a reference corpus, through an index of interval/rhythm n-grams.
+
+A melody is read as a sequence of events (a note or a rest, with its prolongations), and
+every event becomes a token `(interval, duration)`: the interval in semitones from the
+previous sounding note (or a marker for the first note and for rests), and the duration
+in eighth notes. Tokens do not depend on the key, so transposed quotes still match.
+
+`NgramIndex` stores the n-grams of all tokens of the references as integers, so for a
+melody of length `L`, both `shared_ratio` and `longest_copy` cost O(L) set lookups (or
+one `searchsorted` over a whole population in the `batch_` versions), whatever the size
+of the corpus.
+"""
+
+import numpy as np
+from melody import Melody, FrozenMelody, Note, note_ids
+from typing import Iterable, List, Sequence, Tuple
+from .features import MelodyFeatures
+
+HOLD = Note.NUM + 1
+MAX_INTERVAL = 24  # larger intervals are clipped
+MAX_DURATION = 16  # longer events are clipped, in eighth notes
+# Interval codes: 0 to 2 * MAX_INTERVAL for intervals, then rests and first notes
+REST = 2 * MAX_INTERVAL + 1
+FIRST = REST + 1
+TOKEN_BITS = 10  # (FIRST + 1) * MAX_DURATION <= 2**10
+
+
+def _ids(melody: Melody | MelodyFeatures | Sequence[Note | int | str] | np.ndarray) -> List[int]:
+    if isinstance(melody, MelodyFeatures):
+        return melody.ids
+    return note_ids(melody)
+
+
+def tokens(ids: Sequence[int]) -> List[int]:
+    """Tokens of the events of a melody, given its note ids. A leading hold is a rest."""
+    result = []
+    previous = None  # last sounding note
+    i = 0
+    while i < len(ids):
+        id = ids[i]
+        start = i
+        i += 1
+        while i < len(ids) and ids[i] == HOLD:
+            i += 1
+        if not 1 <= id <= Note.NUM:
+            interval = REST
+        elif previous is None:
+            interval = FIRST
+        else:
+            interval = min(max(id - previous, -MAX_INTERVAL), MAX_INTERVAL) + MAX_INTERVAL
+        if 1 <= id <= Note.NUM:
+            previous = id
+        result.append(interval * MAX_DURATION + min(i - start, MAX_DURATION) - 1)
+    return result
+
+
+def batch_tokens(notes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Batched `tokens` of a `(individuals, length)` matrix of note ids.
+
+    Returns
+    -------
+    `(tokens, count)`: a `(individuals, length)` matrix whose first `count[i]` entries
+    in row `i` are the tokens of that row (the rest is `-1`), and the number of events.
+    """
+    notes = np.asarray(notes)
+    if notes.ndim != 2:
+        raise ValueError(f"Expected 2-D array of note ids, given shape {notes.shape}")
+    notes = notes.astype(np.int16)
+    individuals, length = notes.shape
+    start = notes != HOLD
+    start[:, 0] = True
+    count = start.sum(axis=1)
+    # Positions of events, moved to the front of every row; `length` past the last one
+    position = np.sort(np.where(start, np.arange(length), length), axis=1)
+    duration = np.diff(position, axis=1, append=length)
+    valid = np.arange(length) < count[:, None]
+
+    pitch = np.take_along_axis(notes, np.minimum(position, length - 1), axis=1)
+    sounding = valid & (pitch >= 1) & (pitch <= Note.NUM)
+    # Index of the last sounding event strictly before every event, -1 if none
+    last = np.maximum.accumulate(np.where(sounding, np.arange(length), -1), axis=1)
+    previous = np.concatenate([np.full((individuals, 1), -1), last[:, :-1]], axis=1)
+    previous_pitch = np.take_along_axis(pitch, np.maximum(previous, 0), axis=1)
+    interval = np.clip(pitch - previous_pitch, -MAX_INTERVAL, MAX_INTERVAL) + MAX_INTERVAL
+    interval = np.where(previous < 0, FIRST, interval)
+    interval = np.where(sounding, interval, REST)
+
+    result = interval.astype(np.int64) * MAX_DURATION + np.minimum(duration, MAX_DURATION) - 1
+    return np.where(valid, result, -1), count
+
+
+class NgramIndex:
+    """
+    Set of the token n-grams of reference melodies.
+
+        index = NgramIndex(melodies.all_melody, n=4)
+        index.shared_ratio(melody)   # fraction of n-grams of `melody` found in references
+        index.longest_copy(melody)   # events in the longest run that may be copied
+
+    The index is picklable, so fitness functions using it can run in worker processes.
+    """
+    n: int
+    codes: np.ndarray
+
+    def __init__(
+        self,
+        references: Iterable[Melody | FrozenMelody | Sequence[Note | int | str] | np.ndarray],
+        n: int = 4,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        `references` : `Iterable[Melody]`
+            Reference melodies, e.g. `melodies.all_melody` or a `Corpus`. Arrays of note
+            ids are accepted too.
+        `n` : `int`, optional
+            Number of events per n-gram, in `[1, 6]`.
+            By default `4`.
+        """
+        if not isinstance(n, int) or not 1 <= n <= 64 // TOKEN_BITS:
+            raise ValueError(f"Expected n: int in [1, {64 // TOKEN_BITS}], given {n}")
+        self.n = n
+        codes = set()
+        for reference in references:
+            codes.update(self._codes(tokens(_ids(reference))))
+        self.codes = np.array(sorted(codes), dtype=np.int64)
+        self._set = codes
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getstate__(self):
+        return {'n': self.n, 'codes': self.codes}
+
+    def __setstate__(self, state) -> None:
+        self.n = state['n']
+        self.codes = state['codes']
+        self._set = set(self.codes.tolist())
+
+    def _codes(self, tokens: List[int]) -> List[int]:
+        codes = []
+        code = 0
+        mask = (1 << (TOKEN_BITS * self.n)) - 1
+        for i, token in enumerate(tokens):
+            code = ((code << TOKEN_BITS) | token) & mask
+            if i >= self.n - 1:
+                codes.append(code)
+        return codes
+
+    def _found(self, melody) -> List[bool]:
+        return [code in self._set for code in self._codes(tokens(_ids(melody)))]
+
+    def shared_ratio(self, melody: Melody | MelodyFeatures | np.ndarray) -> float:
+        """Fraction of the n-grams of `melody` found in the references, `0.0` if it has none."""
+        found = self._found(melody)
+        return sum(found) / len(found) if found else 0.0
+
+    def longest_copy(self, melody: Melody | MelodyFeatures | np.ndarray) -> int:
+        """
+        Number of events of the longest run of `melody` whose n-grams are all found in the
+        references, `0` if none is. A run copied verbatim from one reference is always
+        found; a run longer than `n` may also be stitched from several references.
+        """
+        longest = run = 0
+        for found in self._found(melody):
+            run = run + 1 if found else 0
+            longest = max(longest, run)
+        return longest + self.n - 1 if longest else 0
+
+    def _batch_found(self, notes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        `(found, windows)`: whether every n-gram of every row is found (`False` past the
+        last one), and the number of n-grams of every row.
+        """
+        tokens, count = batch_tokens(notes)
+        windows = tokens.shape[1] - self.n + 1
+        count = np.maximum(count - self.n + 1, 0)
+        if windows <= 0 or len(self.codes) == 0:
+            return np.zeros((len(tokens), max(windows, 0)), dtype=bool), count
+        codes = np.zeros((len(tokens), windows), dtype=np.int64)
+        for i in range(self.n):
+            codes = (codes << TOKEN_BITS) | np.maximum(tokens[:, i:i + windows], 0)
+        index = np.minimum(np.searchsorted(self.codes, codes), len(self.codes) - 1)
+        valid = np.arange(windows) < count[:, None]
+        return (self.codes[index] == codes) & valid, count
+
+    def batch_shared_ratio(self, notes: np.ndarray) -> np.ndarray:
+        """`shared_ratio` of every row of a `(individuals, length)` matrix of note ids."""
+        found, windows = self._batch_found(notes)
+        return np.where(windows > 0, found.sum(axis=1) / np.maximum(windows, 1), 0.0)
+
+    def batch_longest_copy(self, notes: np.ndarray) -> np.ndarray:
+        """`longest_copy` of every row of a `(individuals, length)` matrix of note ids."""
+        found, _ = self._batch_found(notes)
+        if found.shape[1] == 0:
+            return np.zeros(len(found), dtype=np.int64)
+        total = np.cumsum(found, axis=1)
+        reset = np.maximum.accumulate(np.where(found, 0, total), axis=1)
+        longest = (total - reset).max(axis=1)
+        return np.where(longest > 0, longest + self.n - 1, 0)
@@ -0,0 +1,237 @@
+"""
+Benchmarks of fitness functions, operators, selection and whole epochs of
+`GeneticAlgorithm`, across melody lengths and population sizes, and of the time
+to start a Python process importing our packages.
+
+    python benchmark.py --output baseline.json
+    python benchmark.py --compare baseline.json
+
+Results are saved as JSON: for every case, the best time of one call in seconds.
+With `--compare`, cases slower than the baseline by more than `--tolerance` are
+reported, and the exit code is `1`.
+"""
+
+import argparse, itertools, json, os, platform, random, subprocess, sys, time
+import numpy as np
+from functools import partial
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+from melody import Melody, get_tonality, melodies
+from algorithm import RandomGenerator, GeneticAlgorithm, operation as op, fitness as F
+from util import RouletteSelection, RouletteSampler, random_interval
+from main import evaluator, batch_evaluator, mutator
+
+FITNESS: Dict[str, Callable[[Melody], float]] = {
+    'interval_score': F.interval_score,
+    'tonality_score': partial(F.tonality_score, mode='major'),
+    'rhythm_score': F.rhythm_score,
+    'stable_score': F.stable_score,
+    'boundary_score': F.boundary_score,
+    'density_penalty': F.density_penalty,
+    'stop_penalty': F.stop_penalty,
+    'rest_penalty': F.rest_penalty,
+    'consecutive_penalty': F.consecutive_penalty,
+    'range_penalty': partial(F.range_penalty, threshold=18),
+    'variety_penalty': partial(F.variety_penalty, threshold=5),
+    'lonely_penalty': F.lonely_penalty,
+    'frequent_penalty': F.frequent_penalty,
+    'get_tonality': partial(get_tonality, mode='major'),
+}
+
+OPERATORS: Dict[str, Callable[[Melody, Melody], Any]] = {
+    'one_point_cross': lambda a, b: op.one_point_cross(a, b, len(a) // 2),
+    'two_points_cross': lambda a, b: op.two_points_cross(a, b, random_interval(len(a))),
+    'one_point_mutate': lambda a, b: op.one_point_mutate(a),
+    'transpose': lambda a, b: op.transpose(a),
+    'inverse': lambda a, b: op.inverse(a),
+    'retrograde': lambda a, b: op.retrograde(a),
+}
+
+SOURCES = ('corpus', 'random')
+
+# Modules whose import time is measured, in a fresh interpreter
+STARTUP = ('melody', 'melody.melodies', 'algorithm', 'main')
+
+
+def make_melodies(source: str, count: int, length: int) -> List[Melody]:
+    """`count` melodies of `length`, cut from the `melodies.all_melody` corpus or random."""
+    if source == 'random':
+        generator = RandomGenerator(length)
+        return [generator() for _ in range(count)]
+    corpus = [id for melody in melodies.all_melody for id in melody.ids]
+    result = []
+    for i in range(count):
+        start = (i * 8) % len(corpus)
+        result.append(Melody.from_ids(corpus[start:] + corpus[:start]).pad_or_cut_to(length))
+    return result
+
+
+def measure(function: Callable[[], Any], min_time: float, repeat: int) -> float:
+    """Best time of one call of `function`, in seconds, like `timeit`."""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+    best = elapsed
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        best = min(best, time.perf_counter() - start)
+    return best / number
+
+
+def cases(lengths: List[int], populations: List[int],
+          max_cells: int) -> Iterator[Tuple[str, Callable[[], Callable[[], Any]]]]:
+    """Name and setup of every case. A setup builds the inputs and returns the function to time."""
+    for source in SOURCES:
+        for length in lengths:
+            for name, function in FITNESS.items():
+
+                def setup(function=function, source=source, length=length):
+                    inputs = itertools.cycle(make_melodies(source, 16, length))
+                    return lambda: function(next(inputs))
+
+                yield f'fitness.{name}[{source},length={length}]', setup
+
+            for name, function in OPERATORS.items():
+
+                def setup(function=function, source=source, length=length):
+                    a, b = make_melodies(source, 2, length)
+                    return lambda: function(a, b)
+
+                yield f'operation.{name}[{source},length={length}]', setup
+
+    for population in populations:
+
+        def setup(population=population):
+            weights = [random.random() for _ in range(population)]
+
+            def select() -> int:
+                selection = RouletteSelection(population)
+                for weight in weights:
+                    selection.submit(weight)
+                return selection.selected_index()
+
+            return select
+
+        yield f'selection.RouletteSelection[population={population}]', setup
+
+        def setup(population=population):
+            weights = np.random.default_rng(0).random(population)
+            return lambda: RouletteSampler(weights).sample(population)
+
+        yield f'selection.RouletteSampler[population={population}]', setup
+
+    for source in SOURCES:
+        for length in lengths:
+            for population in populations:
+                if length * population > max_cells:
+                    continue
+
+                def setup(source=source, length=length, population=population):
+                    algorithm = GeneticAlgorithm(
+                        population=make_melodies(source, population, length),
+                        mutation_rate=0.2,
+                        epoch=1,
+                        score_function=evaluator,
+                        batch_score_function=batch_evaluator,
+                        mutate_function=mutator,
+                        cross_function=op.random_two_points_cross,
+                    )
+
+                    def epoch() -> None:
+                        algorithm._update_score()
+                        algorithm._next_generation()
+
+                    return epoch
+
+                yield f'genetic.epoch[{source},length={length},population={population}]', setup
+
+    for module in ('', *STARTUP):
+
+        def setup(module=module):
+            command = [sys.executable, '-c', f'import {module}' if module else 'pass']
+            directory = os.path.dirname(os.path.abspath(__file__))
+            return lambda: subprocess.run(command, cwd=directory, check=True)
+
+        yield f'startup.import[{module or "python"}]', setup
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    random.seed(args.seed)
+    results: Dict[str, float] = {}
+    for name, setup in cases(args.lengths, args.populations, args.max_cells):
+        if args.filter and not any(f in name for f in args.filter):
+            continue
+        results[name] = measure(setup(), args.min_time, args.repeat)
+        print(f'{name:<72} {results[name] * 1e6:12.2f} us', file=sys.stderr)
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'platform': platform.platform(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'lengths': args.lengths,
+            'populations': args.populations,
+        },
+        'results': results,
+    }
+
+
+def compare(current: Dict[str, float], baseline: Dict[str, float], tolerance: float) -> List[str]:
+    """Print the ratio of every common case, and return names of the regressions."""
+    regressions = []
+    for name in sorted(current.keys() & baseline.keys()):
+        ratio = current[name] / baseline[name]
+        mark = ''
+        if ratio > 1 + tolerance:
+            regressions.append(name)
+            mark = '  REGRESSION'
+        print(f'{name:<72} {ratio:8.3f}x{mark}')
+    return regressions
+
+
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Benchmark melody composition.')
+    parser.add_argument('--lengths', type=int, nargs='+', default=[32, 256, 4096],
+                        help='melody lengths')
+    parser.add_argument('--populations', type=int, nargs='+', default=[10, 1000, 10000],
+                        help='population sizes')
+    parser.add_argument('--max-cells', type=int, default=1_000_000,
+                        help='skip epochs of populations with more notes than this')
+    parser.add_argument('-k', '--filter', nargs='+', help='only run cases containing one of these')
+    parser.add_argument('--min-time', type=float, default=0.05,
+                        help='minimal duration of one measure, in seconds')
+    parser.add_argument('--repeat', type=int, default=3, help='number of measures per case')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    parser.add_argument('-o', '--output', help='save results to this JSON file')
+    parser.add_argument('-c', '--compare', help='compare results with this JSON file')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='relative slowdown reported as a regression')
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str] | None = None) -> int:
+    args = parse_args(argv)
+    report = run(args)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = compare(report['results'], baseline['results'], args.tolerance)
+        if regressions:
+            print(f'{len(regressions)} regressions', file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,181 @@
+"""
+Headless batch composition: runs one `GeneticAlgorithm` per seed across processes,
+saves every best melody as a midi file and writes a manifest of their scores.
+
+    python compose.py --count 1000 --seed 0 --workers 8 --output ./out
+
+No audio device and no interactive prompt is needed.
+"""
+
+import argparse, csv, json, os, random, sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List
+from melody import save_midi, melodies
+from algorithm import RandomGenerator, MarkovGenerator, GeneticAlgorithm, operation as op
+from main import evaluator, batch_evaluator, mutator
+
+
+def compose(
+    seed: int,
+    *,
+    length: int,
+    population: int,
+    epoch: int,
+    mutation_rate: float,
+    output: str,
+    init: str = 'markov',
+    key: str | None = None,
+    generator: MarkovGenerator | None = None,
+) -> Dict[str, Any]:
+    """
+    Compose one melody with seed `seed`, save it in `output`, and return its manifest entry.
+    The initial population is drawn uniformly (`init='random'`) or by a `MarkovGenerator`
+    trained on `melodies.all_melody` (`init='markov'`), optionally in `key`. Pass the
+    trained `generator` to share it between seeds.
+    """
+    random.seed(seed)
+    if init == 'random':
+        initial = [RandomGenerator(length)() for _ in range(population)]
+    else:
+        if generator is None:
+            generator = MarkovGenerator(melodies.all_melody, length, key=key)
+        initial = generator.sample(population)
+    algorithm = GeneticAlgorithm(
+        population=initial,
+        mutation_rate=mutation_rate,
+        epoch=epoch,
+        score_function=evaluator,
+        batch_score_function=batch_evaluator,
+        mutate_function=mutator,
+        cross_function=op.random_two_points_cross,
+        length=length,
+    )
+    algorithm.evolve()
+    melody = algorithm.choose_best()
+
+    path = os.path.join(output, f'{seed}.mid')
+    save_midi(melody, path)
+    total, components = evaluator.breakdown(melody)
+    return {
+        'seed': seed,
+        'path': path,
+        'melody': [str(note) for note in melody],
+        'total': total,
+        'components': components,
+    }
+
+
+def _compose_task(arguments: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        return compose(**arguments)
+    except Exception as error:
+        return {'seed': arguments['seed'], 'error': f'{type(error).__name__}: {error}'}
+
+
+def compose_all(seeds: List[int], workers: int, **options: Any) -> Iterator[Dict[str, Any]]:
+    """
+    Manifest entries of all `seeds`, in order, composed by `workers` processes. A seed that
+    fails does not stop the others: its entry is `{'seed': seed, 'error': message}`.
+    """
+    if options.get('init', 'markov') == 'markov' and options.get('generator') is None:
+        # The model does not depend on the seed, so it is trained once for all of them
+        options['generator'] = MarkovGenerator(melodies.all_melody, options['length'],
+                                               key=options.get('key'))
+    tasks = [dict(options, seed=seed) for seed in seeds]
+    if workers <= 1:
+        yield from map(_compose_task, tasks)
+        return
+    with ProcessPoolExecutor(workers) as executor:
+        yield from executor.map(_compose_task, tasks, chunksize=max(1, len(tasks) // (4 * workers)))
+
+
+def write_manifest(entries: Iterator[Dict[str, Any]], file, format: str) -> int:
+    """Write manifest `entries` to `file` as `'jsonl'` or `'csv'`. Returns the number of entries."""
+    count = 0
+    writer = None
+    for entry in entries:
+        if format == 'jsonl':
+            file.write(json.dumps(entry) + '\n')
+        else:
+            row = dict(seed=entry['seed'], path=entry['path'], melody=' '.join(entry['melody']),
+                       total=entry['total'], **entry['components'])
+            if writer is None:
+                writer = csv.DictWriter(file, fieldnames=list(row))
+                writer.writeheader()
+            writer.writerow(row)
+        file.flush()
+        count += 1
+    return count
+
+
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Compose many melodies without playing them.')
+    parser.add_argument('-n', '--count', type=int, default=10, help='number of melodies')
+    parser.add_argument('-s', '--seed', type=int, default=0,
+                        help='first seed, melodies use seeds [seed, seed + count)')
+    parser.add_argument('-l', '--length', type=int, default=32, help='length of every melody')
+    parser.add_argument('-p', '--population', type=int, default=10, help='population size')
+    parser.add_argument('-e', '--epoch', type=int, default=1000, help='number of iterations')
+    parser.add_argument('-m', '--mutation-rate', type=float, default=0.2, help='mutation rate')
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count() or 1,
+                        help='number of processes')
+    parser.add_argument('-i', '--init', choices=('markov', 'random'), default='markov',
+                        help='initial population: trained on melodies.py, or uniform')
+    parser.add_argument('-k', '--key', default=None,
+                        help="key of the initial population with --init markov, e.g. 'C major'")
+    parser.add_argument('-o', '--output', default='./output', help='output directory')
+    parser.add_argument('-f', '--format', choices=('jsonl', 'csv'), default='jsonl',
+                        help='format of the manifest')
+    args = parser.parse_args(argv)
+    for name in ('count', 'length', 'population', 'workers'):
+        if getattr(args, name) <= 0:
+            parser.error(f"--{name} must be positive")
+    if args.epoch < 0:
+        parser.error(f"--epoch must be non-negative")
+    if args.key is not None and args.init != 'markov':
+        parser.error(f"--key requires --init markov")
+    return args
+
+
+def main(argv: List[str] | None = None) -> None:
+    args = parse_args(argv)
+    generator = None
+    if args.init == 'markov':
+        try:
+            generator = MarkovGenerator(melodies.all_melody, args.length, key=args.key)
+        except ValueError as error:
+            sys.exit(f"Invalid --key: {error}")
+    os.makedirs(args.output, exist_ok=True)
+    entries = compose_all(
+        list(range(args.seed, args.seed + args.count)),
+        args.workers,
+        length=args.length,
+        population=args.population,
+        epoch=args.epoch,
+        mutation_rate=args.mutation_rate,
+        output=args.output,
+        init=args.init,
+        key=args.key,
+        generator=generator,
+    )
+    failures = []
+
+    def succeeded(entries: Iterator[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        for entry in entries:
+            if 'error' in entry:
+                print(f"seed {entry['seed']} failed: {entry['error']}", file=sys.stderr)
+                failures.append(entry)
+            else:
+                yield entry
+
+    manifest = os.path.join(args.output, f'manifest.{args.format}')
+    with open(manifest, 'w', newline='') as file:
+        count = write_manifest(succeeded(entries), file, args.format)
+    print(f'{count} melodies written to {args.output}, manifest: {manifest}', file=sys.stderr)
+    if failures:
+        sys.exit(f"{len(failures)} of {args.count} melodies failed, seeds: "
+                 + ' '.join(str(entry['seed']) for entry in failures))
+
+
+if __name__ == '__main__':
+    main()
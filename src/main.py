@@ -1,37 +1,70 @@
 from melody import save_midi, play_midi, Melody, Note, Tonality, melodies
-from algorithm import RandomGenerator, GeneticAlgorithm, operation as op, fitness as F
+from algorithm import RandomGenerator, MarkovGenerator, GeneticAlgorithm, operation as op, fitness as F
+from algorithm import batch_fitness as BF
+import numpy as np
 import random
 from util import random_interval
-import matplotlib.pyplot as plt
 import os, sys, time
+from functools import partial
+from typing import Tuple
 
 # Fixed random seed
 # random.seed(3407)  # Some magic number here!
 
 
-def mutator(melody: Melody) -> None:
+def mutator(melody: Melody) -> Tuple[int, int] | None:
     value = random.random()
     if value < 0.4:
-        op.one_point_mutate(melody)
+        return op.one_point_mutate(melody)
     elif value < 0.6:
-        op.transpose(melody)
+        return op.transpose(melody)
     elif value < 0.8:
-        op.inverse(melody)
+        return op.inverse(melody)
     else:
-        op.retrograde(melody)
+        return op.retrograde(melody)
 
 
-def evaluator(x: Melody) -> float:
-    return (0.8 * F.interval_score(x) + 0.4 * F.rhythm_score(x) +
-            0.6 * F.tonality_score(x, 'major') + 0.2 * F.stable_score(x) +
-            0.6 * F.boundary_score(x) - F.density_penalty(x) - F.stop_penalty(x) -
-            F.rest_penalty(x) - F.consecutive_penalty(x, 7) - F.range_penalty(x, 18) -
-            F.variety_penalty(x, 5) - F.lonely_penalty(x))
+evaluator = F.WeightedEvaluator({
+    'interval': (0.8, F.interval_score),
+    'rhythm': (0.4, F.rhythm_score),
+    'tonality': (0.6, partial(F.tonality_score, mode='major')),
+    'stable': (0.2, F.stable_score),
+    'boundary': (0.6, F.boundary_score),
+    'density': (-1.0, F.density_penalty),
+    'stop': (-1.0, F.stop_penalty),
+    'rest': (-1.0, F.rest_penalty),
+    'consecutive': (-1.0, partial(F.consecutive_penalty, threshold=7)),
+    'range': (-1.0, partial(F.range_penalty, threshold=18)),
+    'variety': (-1.0, partial(F.variety_penalty, threshold=5)),
+    'lonely': (-1.0, F.lonely_penalty),
+})
+
+
+# Same components as `evaluator`, on whole populations; weights are taken from `evaluator`
+batch_terms = {
+    'interval': BF.interval_score,
+    'rhythm': BF.rhythm_score,
+    'tonality': partial(BF.tonality_score, mode='major'),
+    'stable': BF.stable_score,
+    'boundary': BF.boundary_score,
+    'density': BF.density_penalty,
+    'stop': BF.stop_penalty,
+    'rest': BF.rest_penalty,
+    'consecutive': partial(BF.consecutive_penalty, threshold=7),
+    'range': partial(BF.range_penalty, threshold=18),
+    'variety': partial(BF.variety_penalty, threshold=5),
+    'lonely': BF.lonely_penalty,
+}
+
+
+def batch_evaluator(x: np.ndarray) -> np.ndarray:
+    return sum(weight * batch_terms[name](x) for name, (weight, _) in evaluator.terms.items())
 
 
 if __name__ == '__main__':
     print('Generating music, please wait...')
-    generator = RandomGenerator(32)
+    generator = MarkovGenerator(melodies.all_melody, 32)
+    # generator = RandomGenerator(32)
 
     algorithm = GeneticAlgorithm(
         population=[generator() for _ in range(10)],  # Initial population
@@ -39,6 +72,7 @@ if __name__ == '__main__':
         mutation_rate=0.2,
         epoch=1000,
         score_function=evaluator,
+        batch_score_function=batch_evaluator,
         mutate_function=mutator,
         cross_function=lambda x, y: op.two_points_cross(x, y, random_interval(32)),
         early_stop=False,
@@ -51,15 +85,10 @@ if __name__ == '__main__':
     melody = algorithm.choose_best()
 
     print(melody)
-    print("Total score: {:.2f}".format(evaluator(melody)))
-    print(
-        "Scores interval:{:.2f}, tonality:{}, rhythm:{:.2f}, stable:{:.2f}, boundary:{:.2f}".format(
-            F.interval_score(melody),
-            F.get_tonality(melody, 'major'),
-            F.rhythm_score(melody),
-            F.stable_score(melody),
-            F.boundary_score(melody),
-        ))
+    total, components = evaluator.breakdown(melody)
+    print("Total score: {:.2f}".format(total))
+    print("Scores " + ", ".join("{}:{:.2f}".format(name, value)
+                                for name, value in components.items()))
     save_midi(melody, './tmp.mid')
     play_midi('./tmp.mid')
     input('Press enter to quit...')
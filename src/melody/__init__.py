@@ -2,6 +2,10 @@ import os, sys
 
 os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "1"
 
-from .midi import save_midi, play_midi, read_midi
-from .music import Melody, Note, Tonality
+from .midi import save_midi, play_midi, read_midi, encode_midi, export_midi
+from .music import Melody, FrozenMelody, Note, Tonality
+from .population import Population
 from .music import Note, Melody, Tonality, TONALITY, STABILITY, get_stability, get_tonality
+from .music import TonalityIndex, compile_tonality, note_ids
+from .corpus import Corpus, CorpusWriter
+from .audio import render, render_wav, render_all, save_wav
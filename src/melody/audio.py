@@ -0,0 +1,153 @@
+"""
+Offline synthesis of melodies to PCM audio, without any audio device.
+
+Timing follows `save_midi`: every note id lasts an eighth note (0.25 seconds at the
+default 120 bpm), a prolongation extends the previous note or rest, and rests are silent.
+Every note of a melody is synthesized in one NumPy operation, so rendering is hundreds of
+times faster than real time.
+"""
+
+import os, wave, itertools
+import numpy as np
+from typing import Iterable, List, Sequence
+from .music import Note, Melody, FrozenMelody, note_ids
+
+WAVEFORMS = ('sine', 'triangle', 'square', 'sawtooth')
+
+
+def _events(ids: Sequence[int]) -> List[tuple]:
+    """`(start, duration, midi note)` in eighth notes, like the events of `save_midi`."""
+    events = []
+    i = 0
+    while i < len(ids):
+        start = i
+        id = ids[i]
+        if not 0 <= id <= Note.NUM:
+            raise ValueError(f"argument melody: invalid melody[{i}] = {id}")
+        i += 1
+        while i < len(ids) and ids[i] == Note.NUM + 1:
+            i += 1
+        if id != 0:
+            events.append((start, i - start, id + 52))
+    return events
+
+
+def _oscillator(phase: np.ndarray, waveform: str) -> np.ndarray:
+    """Periodic wave of period 1 in `phase`, in `[-1, 1]`."""
+    fraction = phase - np.floor(phase)
+    if waveform == 'sine':
+        return np.sin(2 * np.pi * phase)
+    elif waveform == 'triangle':
+        return 4 * np.abs(fraction - 0.5) - 1
+    elif waveform == 'square':
+        return np.where(fraction < 0.5, 1.0, -1.0)
+    elif waveform == 'sawtooth':
+        return 2 * fraction - 1
+    raise ValueError(f"Unknown waveform {waveform}, expected one of {WAVEFORMS}")
+
+
+def render(
+    melody: Melody | FrozenMelody | Sequence[Note | int | str] | np.ndarray,
+    *,
+    sample_rate: int = 22050,
+    eighth: float = 0.25,
+    waveform: str = 'triangle',
+    attack: float = 0.01,
+    release: float = 0.05,
+    volume: float = 0.5,
+) -> np.ndarray:
+    """
+    Synthesize a melody to a mono `float32` buffer in `[-1, 1]`.
+
+    Parameters
+    ----------
+    `melody` : `Melody`
+        The melody, or its note ids.
+    `sample_rate` : `int`, optional
+        Samples per second.
+        By default `22050`.
+    `eighth` : `float`, optional
+        Duration of an eighth note, in seconds.
+        By default `0.25`, as in `save_midi`.
+    `waveform` : `str`, optional
+        One of `'sine'`, `'triangle'`, `'square'` and `'sawtooth'`.
+        By default `'triangle'`.
+    `attack`, `release` : `float`, optional
+        Durations of the linear fade in and out of every note, in seconds.
+        By default `0.01` and `0.05`.
+    `volume` : `float`, optional
+        Peak amplitude, in `[0, 1]`.
+        By default `0.5`.
+    """
+    if waveform not in WAVEFORMS:
+        raise ValueError(f"Unknown waveform {waveform}, expected one of {WAVEFORMS}")
+    ids = note_ids(melody)
+    if not eighth * sample_rate >= 1:
+        raise ValueError(f"Expected eighth * sample_rate >= 1, given {eighth} * {sample_rate}")
+    step = round(eighth * sample_rate)  # samples per eighth note
+    output = np.zeros(len(ids) * step, dtype=np.float32)
+    events = _events(ids)
+    if not events:
+        return output
+
+    # Every sounding sample at once: `note` is the event of each sample, `t` its offset in it
+    starts = np.array([start for start, _, _ in events]) * step
+    lengths = np.array([duration for _, duration, _ in events]) * step
+    frequency = 440.0 * 2**((np.array([note for _, _, note in events]) - 69) / 12)
+    note = np.repeat(np.arange(len(events)), lengths)
+    offsets = np.cumsum(lengths) - lengths
+    t = np.arange(len(note)) - offsets[note]
+    samples = _oscillator(frequency[note] * t / sample_rate, waveform)
+
+    attack_samples = max(1, round(attack * sample_rate))
+    release_samples = max(1, round(release * sample_rate))
+    envelope = np.minimum(np.minimum(1.0, (t + 1) / attack_samples),
+                          (lengths[note] - t) / release_samples)
+    output[starts[note] + t] = volume * samples * envelope
+    return output
+
+
+def to_pcm16(buffer: np.ndarray) -> np.ndarray:
+    """Convert a `float` buffer in `[-1, 1]` to 16-bit PCM."""
+    return (np.clip(buffer, -1.0, 1.0) * 32767).astype('<i2')
+
+
+def save_wav(buffer: np.ndarray, path: str, *, sample_rate: int = 22050) -> None:
+    """Save a mono `float` buffer (see `render`) as a 16-bit PCM wav file."""
+    with wave.open(path, 'wb') as file:
+        file.setnchannels(1)
+        file.setsampwidth(2)
+        file.setframerate(sample_rate)
+        file.writeframes(to_pcm16(buffer).tobytes())
+
+
+def render_wav(melody: Melody | Sequence[Note | int | str] | np.ndarray, path: str, *,
+               sample_rate: int = 22050, **options) -> None:
+    """`render` a melody and save it as a wav file. `options` are passed to `render`."""
+    save_wav(render(melody, sample_rate=sample_rate, **options), path, sample_rate=sample_rate)
+
+
+def render_all(
+    melodies: Iterable[Melody | Sequence[Note | int | str] | np.ndarray],
+    directory: str,
+    *,
+    names: Iterable[str] | None = None,
+    sample_rate: int = 22050,
+    **options,
+) -> List[str]:
+    """
+    Render many melodies (a list, a `Population` or a 2-D array of note ids) to wav files
+    in `directory`, named `0.wav`, `1.wav`... unless `names` is given. Returns the paths.
+    """
+    from .population import Population
+    if isinstance(melodies, Population):
+        melodies = melodies.data
+    if names is None:
+        names = (f'{i}.wav' for i in itertools.count())
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for name, melody in zip(names, melodies):
+        path = os.path.join(directory, name)
+        render_wav(melody, path, sample_rate=sample_rate, **options)
+        paths.append(path)
+    return paths
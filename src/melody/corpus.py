@@ -0,0 +1,237 @@
+"""
+A compact on-disk corpus of melodies, read through a memory map.
+
+Layout of a corpus file (all integers little-endian):
+
+    header      magic `b'MELODYDB'`, version, count, and offsets of the sections below
+    notes       note ids of all melodies, one `uint8` per note, back to back
+    index       `count + 1` `uint64` offsets of every melody in `notes`
+    meta index  `count + 1` `uint64` offsets of every metadata record in `metadata`
+    metadata    one UTF-8 JSON object per melody, e.g.
+                `{"title": "...", "key": "C", "tags": ["中", "平静"]}`
+
+Opening a corpus only reads the header: melodies and metadata are read on demand.
+"""
+
+import os, re, json, struct
+import numpy as np
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+from .music import Note, Melody
+
+MAGIC = b'MELODYDB'
+VERSION = 1
+# magic, version, count, notes offset, index offset, meta index offset, metadata offset
+_HEADER = struct.Struct('<8sIQQQQQ')
+
+
+class CorpusWriter:
+    """
+    Writes a corpus file, one melody at a time. Notes are streamed to disk, so memory
+    only grows with the index and metadata. The file appears at `path` when closed.
+
+        with CorpusWriter('corpus.bin') as writer:
+            writer.add(melody, title='...', key='C', tags=['中', '平静'])
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._temporary = f'{path}.tmp'
+        self._file = open(self._temporary, 'wb')
+        self._file.write(bytes(_HEADER.size))
+        self._offsets: List[int] = [0]
+        self._metadata: List[bytes] = []
+
+    def add(self, melody: Melody | Sequence[Note | int | str] | np.ndarray, **metadata: Any) -> int:
+        """Append `melody` with JSON-serializable `metadata`. Returns its index."""
+        if isinstance(melody, np.ndarray):
+            ids = np.asarray(melody, dtype=np.uint8)
+            if ids.ndim != 1 or (ids > Note.NUM + 1).any():
+                raise ValueError(f"Expected 1-D array of note ids in [0, {Note.NUM + 1}]")
+            data = ids.tobytes()
+        else:
+            if not isinstance(melody, Melody):
+                melody = Melody(melody)
+            data = bytes(melody.ids)
+        self._file.write(data)
+        self._offsets.append(self._offsets[-1] + len(data))
+        self._metadata.append(json.dumps(metadata, ensure_ascii=False).encode('utf-8'))
+        return len(self._metadata) - 1
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        count = len(self._metadata)
+        index_offset = _HEADER.size + self._offsets[-1]
+        self._file.write(np.array(self._offsets, dtype='<u8').tobytes())
+        meta_offsets = np.cumsum([0] + [len(m) for m in self._metadata], dtype=np.uint64)
+        meta_index_offset = index_offset + 8 * (count + 1)
+        self._file.write(meta_offsets.astype('<u8').tobytes())
+        metadata_offset = meta_index_offset + 8 * (count + 1)
+        self._file.write(b''.join(self._metadata))
+        self._file.seek(0)
+        self._file.write(
+            _HEADER.pack(MAGIC, VERSION, count, _HEADER.size, index_offset, meta_index_offset,
+                         metadata_offset))
+        self._file.close()
+        os.replace(self._temporary, self.path)
+
+    def __enter__(self) -> 'CorpusWriter':
+        return self
+
+    def __exit__(self, error_type, *args) -> None:
+        if error_type is None:
+            self.close()
+        else:
+            self._file.close()
+            os.remove(self._temporary)
+
+
+class Corpus:
+    """
+    Read-only access to a corpus file through a memory map. `corpus[i]` is a `Melody`,
+    `corpus.notes(i)` its note ids (a view, without copy) and `corpus.metadata(i)` a dict.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Raises
+        ------
+        `ValueError`
+            if the file is not a corpus of a supported version.
+        """
+        self.path = path
+        with open(path, 'rb') as file:
+            header = file.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            raise ValueError(f"{path} is not a corpus file")
+        magic, version, count, notes_offset, index_offset, meta_index_offset, metadata_offset = \
+            _HEADER.unpack(header)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a corpus file")
+        if version != VERSION:
+            raise ValueError(f"Unsupported corpus version {version} in {path}")
+        self._map = np.memmap(path, dtype=np.uint8, mode='r')
+        self._notes = self._map[notes_offset:index_offset]
+        self._index = self._map[index_offset:meta_index_offset].view('<u8')
+        self._meta_index = self._map[meta_index_offset:metadata_offset].view('<u8')
+        self._metadata = self._map[metadata_offset:]
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _check(self, index: int) -> int:
+        if not -self._count <= index < self._count:
+            raise IndexError(f"Corpus index {index} out of range [0, {self._count})")
+        return index % self._count
+
+    def notes(self, index: int) -> np.ndarray:
+        """Note ids of melody `index`, as a read-only `uint8` view of the file."""
+        index = self._check(index)
+        return self._notes[self._index[index]:self._index[index + 1]]
+
+    def metadata(self, index: int) -> Dict[str, Any]:
+        index = self._check(index)
+        data = self._metadata[self._meta_index[index]:self._meta_index[index + 1]]
+        return json.loads(data.tobytes().decode('utf-8'))
+
+    def lengths(self) -> np.ndarray:
+        """Length of every melody."""
+        return np.diff(self._index).astype(np.int64)
+
+    def __getitem__(self, index: int) -> Melody:
+        return Melody.from_ids(self.notes(index).tolist())
+
+    def __iter__(self) -> Iterator[Melody]:
+        for i in range(self._count):
+            yield self[i]
+
+    def items(self) -> Iterator[Tuple[Melody, Dict[str, Any]]]:
+        """Every melody with its metadata."""
+        for i in range(self._count):
+            yield self[i], self.metadata(i)
+
+    def close(self) -> None:
+        """Release the memory map. Views returned by `notes` must not be used afterwards."""
+        self._map = self._notes = self._index = self._meta_index = self._metadata = None
+        self._count = 0
+
+    def __enter__(self) -> 'Corpus':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+# Converters
+
+_COMMENT = re.compile(r"^# *\d+\. *(.*)\n_SOURCES\['(\w+)'\] *= *\(", re.MULTILINE)
+_KEY = re.compile(r'([#b]?)([A-Ga-g])(大调|小调)')
+TAGS = ('低', '少', '中', '高', '平静', '欢乐', '悲伤')
+
+
+def _parse_comment(comment: str) -> Dict[str, Any]:
+    """Title, key and tags from a comment of `melody.melodies`, like
+    `欢乐颂选段 - 贝多芬 - C大调 中 平静`."""
+    parts = [part.strip() for part in re.split(r' *- +|- ', comment)]
+    metadata: Dict[str, Any] = {'title': parts[0]}
+    key = _KEY.search(comment)
+    if key is not None:
+        accidental, name, mode = key.groups()
+        metadata['key'] = name.upper() + accidental + ('m' if mode == '小调' else '')
+    words = re.split(r'[\s\-（）()]+', comment)
+    metadata['tags'] = [word for word in words if word in TAGS]
+    return metadata
+
+
+def convert_melodies(path: str) -> int:
+    """
+    Write all melodies of `melody.melodies` to corpus `path`, with the title, key and tags
+    of their comments. Returns the number of melodies.
+    """
+    from . import melodies
+    with open(melodies.__file__, encoding='utf-8') as file:
+        source = file.read()
+    found = _COMMENT.findall(source)
+    with CorpusWriter(path) as writer:
+        for comment, name in found:
+            writer.add(getattr(melodies, name), name=name, **_parse_comment(comment))
+    return len(found)
+
+
+def convert_midi_directory(
+    directory: str,
+    path: str,
+    *,
+    workers: int | None = None,
+    cache_dir: str | None = None,
+) -> List[Tuple[str, str]]:
+    """
+    Write all midi files of `directory` (recursively, in sorted order) to corpus `path`,
+    titled by their relative path. Files are parsed by `ingest.ingest_directory`, see it for
+    `workers` and `cache_dir`. Returns `(file, error)` of the files that could not be parsed.
+    """
+    from .ingest import ingest_directory
+    result = ingest_directory(directory, workers=workers, cache_dir=cache_dir)
+    with CorpusWriter(path) as writer:
+        for file, ids in zip(result.files, result.notes):
+            writer.add(ids, title=os.path.relpath(file, directory), tags=['midi'])
+    return result.errors
+
+
+def convert_manifest(manifest: str, path: str) -> int:
+    """
+    Write the melodies of a `compose.py` manifest (`.jsonl`) to corpus `path`, with their
+    seed and scores. Returns the number of melodies.
+    """
+    count = 0
+    with open(manifest, encoding='utf-8') as file, CorpusWriter(path) as writer:
+        for line in file:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            writer.add(entry['melody'], title=os.path.basename(entry['path']),
+                       seed=entry['seed'], total=entry['total'],
+                       components=entry['components'], tags=['generated'])
+            count += 1
+    return count
@@ -0,0 +1,211 @@
+"""
+Bulk ingestion of midi libraries.
+
+Unlike `read_midi`, `parse_midi` accepts any midi file: notes of all tracks and channels
+(except drums) are merged, quantized to the eighth-note grid and folded by octaves into
+`[F3, G5]`. When several notes sound at once, the highest one is kept.
+
+`ingest_directory` parses all files of a directory across processes. Files that can not
+be parsed are reported instead of aborting, and results are cached by content hash, so
+ingesting an unchanged library again only costs reading and hashing the files.
+"""
+
+import io, os, hashlib, logging
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Sequence, Tuple
+from .music import Note, Melody
+
+# Bump when `parse_midi` changes, to invalidate caches
+PARSER_VERSION = 2
+logger = logging.getLogger(__name__)
+DRUM_CHANNEL = 9
+LOWEST, HIGHEST = 53, 52 + Note.NUM  # F3 and G5
+
+
+def _fold(pitch: int) -> int:
+    while pitch < LOWEST:
+        pitch += 12
+    while pitch > HIGHEST:
+        pitch -= 12
+    return pitch
+
+
+def parse_midi(data: bytes) -> np.ndarray:
+    """
+    Note ids of the melody of a midi file, given its content.
+
+    Raises
+    ------
+    `ValueError`
+        if the file contains no note.
+    (and any error of `mido` on malformed files)
+    """
+    from mido import MidiFile
+    midi = MidiFile(file=io.BytesIO(data))
+    grid = midi.ticks_per_beat / 2
+
+    # (start, end, pitch) in ticks
+    notes: List[Tuple[int, int, int]] = []
+    last_tick = 0  # end of the longest track, so that trailing rests are kept like `read_midi`
+    for track in midi.tracks:
+        tick = 0
+        active = {}
+        for message in track:
+            tick += message.time
+            if message.type not in ('note_on', 'note_off') or message.channel == DRUM_CHANNEL:
+                continue
+            key = (message.channel, message.note)
+            if key in active:
+                notes.append((active.pop(key), tick, message.note))
+            if message.type == 'note_on' and message.velocity > 0:
+                active[key] = tick
+        notes += [(start, tick, pitch) for (_, pitch), start in active.items()]
+        last_tick = max(last_tick, tick)
+    if not notes:
+        raise ValueError(f"No note in midi file")
+
+    starts = [round(start / grid) for start, _, _ in notes]
+    ends = [max(s + 1, round(end / grid)) for s, (_, end, _) in zip(starts, notes)]
+    owner = np.full(max(max(ends), round(last_tick / grid)), -1)
+    # Paint lower notes first, so that the highest note sounding at a step wins
+    for i in sorted(range(len(notes)), key=lambda i: notes[i][2]):
+        owner[starts[i]:ends[i]] = i
+
+    ids = np.zeros(len(owner), dtype=np.uint8)
+    pitch = np.array([_fold(p) - 52 for _, _, p in notes] + [0])
+    ids[:] = pitch[owner]  # `owner == -1` gives the trailing 0, i.e. a rest
+    hold = np.zeros(len(owner), dtype=bool)
+    hold[1:] = owner[1:] == owner[:-1]  # also prolongs rests, like `read_midi`
+    ids[hold] = Note.NUM + 1
+    return ids
+
+
+class IngestResult:
+    """Parsed melodies (as note-id arrays) with their files, and files that failed."""
+    files: List[str]
+    notes: List[np.ndarray]
+    errors: List[Tuple[str, str]]
+    cache_hits: int
+
+    def __init__(self) -> None:
+        self.files = []
+        self.notes = []
+        self.errors = []
+        self.cache_hits = 0
+
+    def melodies(self) -> List[Melody]:
+        return [Melody.from_ids(ids.tolist()) for ids in self.notes]
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+
+def _cache_path(cache_dir: str, digest: str, suffix: str) -> str:
+    return os.path.join(cache_dir, digest[:2], digest + suffix)
+
+
+def _write_atomically(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f'{path}.{os.getpid()}.tmp'
+    try:
+        with open(temporary, 'wb') as file:
+            file.write(data)
+        os.replace(temporary, path)
+    except OSError:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+
+
+def _ingest_file(path: str, cache_dir: str | None) -> Tuple[bytes | None, str | None, bool]:
+    """`(note ids, error, cache hit)` of one file."""
+    try:
+        with open(path, 'rb') as file:
+            data = file.read()
+    except OSError as error:
+        return None, str(error), False
+    if cache_dir is not None:
+        digest = hashlib.sha256(data + PARSER_VERSION.to_bytes(4, 'little')).hexdigest()
+        for suffix, is_error in (('.ids', False), ('.err', True)):
+            try:
+                with open(_cache_path(cache_dir, digest, suffix), 'rb') as file:
+                    cached = file.read()
+            except FileNotFoundError:
+                continue
+            except OSError as exception:
+                logger.warning("Can not read the cache of %s in %s: %s", path, cache_dir, exception)
+                continue
+            return (None, cached.decode('utf-8'), True) if is_error else (cached, None, True)
+    try:
+        ids, error = parse_midi(data).tobytes(), None
+    except Exception as exception:
+        ids, error = None, str(exception) or type(exception).__name__
+    if cache_dir is not None:
+        # The cache is only an optimisation: never lose a parsed file because of it
+        try:
+            if ids is not None:
+                _write_atomically(_cache_path(cache_dir, digest, '.ids'), ids)
+            else:
+                _write_atomically(_cache_path(cache_dir, digest, '.err'), error.encode('utf-8'))
+        except OSError as exception:
+            logger.warning("Can not cache %s in %s: %s", path, cache_dir, exception)
+    return ids, error, False
+
+
+def _ingest_chunk(paths: Sequence[str], cache_dir: str | None):
+    return [_ingest_file(path, cache_dir) for path in paths]
+
+
+def find_midi_files(directory: str) -> List[str]:
+    """All midi files of `directory`, recursively, in sorted order."""
+    return sorted(
+        os.path.join(root, name)
+        for root, _, names in os.walk(directory)
+        for name in names
+        if name.lower().endswith(('.mid', '.midi')))
+
+
+def ingest_directory(
+    directory: str,
+    *,
+    workers: int | None = None,
+    cache_dir: str | None = None,
+    chunk_size: int = 64,
+) -> IngestResult:
+    """
+    Parse all midi files of `directory` with `parse_midi`.
+
+    Parameters
+    ----------
+    `directory` : `str`
+        Searched recursively for `.mid` and `.midi` files.
+    `workers` : `int`, optional
+        Number of processes. `1` parses in this process.
+        By default `None`, i.e. one per CPU.
+    `cache_dir` : `str`, optional
+        If given, results (and errors) are cached there, keyed by the hash of the file
+        content, so renamed or moved files are found too.
+        By default `None`, i.e. no cache.
+    `chunk_size` : `int`, optional
+        Number of files per task.
+        By default `64`.
+    """
+    files = find_midi_files(directory)
+    chunks = [files[i:i + chunk_size] for i in range(0, len(files), chunk_size)]
+    if workers == 1 or len(chunks) <= 1:
+        outputs = [_ingest_chunk(chunk, cache_dir) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(workers) as executor:
+            outputs = list(executor.map(_ingest_chunk, chunks, [cache_dir] * len(chunks)))
+
+    result = IngestResult()
+    for chunk, output in zip(chunks, outputs):
+        for path, (ids, error, hit) in zip(chunk, output):
+            result.cache_hits += hit
+            if error is not None:
+                result.errors.append((path, error))
+            else:
+                result.files.append(path)
+                result.notes.append(np.frombuffer(ids, dtype=np.uint8))
+    return result
@@ -1,89 +1,96 @@
 from . import Melody, save_midi, play_midi
+from typing import Dict, List
 """
     有如下分类：
         音符频率：低 中 高
         情感：平静 欢乐 悲伤
+
+    旋律在第一次访问时才构造（见 `__getattr__`），导入本模块几乎不耗时。
 """
 
+# Note names of every melody, and names of the melodies of every list
+_SOURCES: Dict[str, List[str]] = {}
+_GROUPS: Dict[str, List[str]] = {}
+
 # 1. 欢乐颂选段 - 贝多芬 - C大调 中 平静
-ode_an_die_freude = Melody("E4 -  E4 -  F4 -  G4 -  "
-                           "G4 -  F4 -  E4 -  D4 -  "
-                           "C4 -  C4 -  D4 -  E4 - "
-                           "E4 -  -  D4 D4 -  -  - "
-                           "E4 -  E4 -  F4 -  G4 - "
-                           "G4 -  F4 -  E4 -  D4 - "
-                           "C4 -  C4 -  D4 -  E4 - "
-                           "D4 -  -  C4 C4 -  -  - "
-                           "- - - - - - - -".split())
+_SOURCES['ode_an_die_freude'] = ("E4 -  E4 -  F4 -  G4 -  "
+                                 "G4 -  F4 -  E4 -  D4 -  "
+                                 "C4 -  C4 -  D4 -  E4 - "
+                                 "E4 -  -  D4 D4 -  -  - "
+                                 "E4 -  E4 -  F4 -  G4 - "
+                                 "G4 -  F4 -  E4 -  D4 - "
+                                 "C4 -  C4 -  D4 -  E4 - "
+                                 "D4 -  -  C4 C4 -  -  - "
+                                 "- - - - - - - -".split())
 
 # 2. 四季《春》第一乐章 - 维瓦尔第 - E大调 中 欢乐
-seasons_spring_the_first = Melody("C5 - #A4 A4 #A4 -  C5 - "
-                                  "D5 - C5  -  -  -  F4 - "
-                                  "C5 - #A4 A4 #A4 -  C5 - "
-                                  "D5 - C5  -  -  -  F4 - "
-                                  "D5 - C5  -  -  -  #A4 - "
-                                  "-  - A4  -  G4 F4 G4 - "
-                                  "- - - - - - - -".split())
+_SOURCES['seasons_spring_the_first'] = ("C5 - #A4 A4 #A4 -  C5 - "
+                                        "D5 - C5  -  -  -  F4 - "
+                                        "C5 - #A4 A4 #A4 -  C5 - "
+                                        "D5 - C5  -  -  -  F4 - "
+                                        "D5 - C5  -  -  -  #A4 - "
+                                        "-  - A4  -  G4 F4 G4 - "
+                                        "- - - - - - - -".split())
 
 # 3. d大调卡农 - 帕西贝尔 - D大调 高 平静
-d_major_canon = Melody("G5 -  E5 F5 G5 -  E5 F5 "
-                       "G5 G4 A4 B4 C5 D5 E5 F5 "
-                       "E5 -  C5 D5 E5 -  E4 F4 "
-                       "G4 A4 G4 F4 G4 E4 F4 G4 "
-                       "F4 -  A4 G4 F4 -  E4 D4 "
-                       "E4 D4 C4 D4 E4 F4 G4 A4 "
-                       "F4 -  A4 G4 A4 -  B4 C5 "
-                       "B4 A4 G4 A4 B4 C5 D5 E5 "
-                       "- - - - - - - -".split())
+_SOURCES['d_major_canon'] = ("G5 -  E5 F5 G5 -  E5 F5 "
+                             "G5 G4 A4 B4 C5 D5 E5 F5 "
+                             "E5 -  C5 D5 E5 -  E4 F4 "
+                             "G4 A4 G4 F4 G4 E4 F4 G4 "
+                             "F4 -  A4 G4 F4 -  E4 D4 "
+                             "E4 D4 C4 D4 E4 F4 G4 A4 "
+                             "F4 -  A4 G4 A4 -  B4 C5 "
+                             "B4 A4 G4 A4 B4 C5 D5 E5 "
+                             "- - - - - - - -".split())
 
 # 4. 十二平均律之c大调前奏曲 - 巴赫 - C大调 - 高 - 平静
-twelve_tone_equal_temperament = Melody("C4 E4 G4 C5 E5 G4 C5 E5 "
-                                       "C4 E4 G4 C5 E5 G4 C5 E5 "
-                                       "C4 E4 A4 D5 F5 A4 D5 F5 "
-                                       "C4 E4 A4 D5 F5 A4 D5 F5 "
-                                       "- - - - - - - -".split())
+_SOURCES['twelve_tone_equal_temperament'] = ("C4 E4 G4 C5 E5 G4 C5 E5 "
+                                             "C4 E4 G4 C5 E5 G4 C5 E5 "
+                                             "C4 E4 A4 D5 F5 A4 D5 F5 "
+                                             "C4 E4 A4 D5 F5 A4 D5 F5 "
+                                             "- - - - - - - -".split())
 
 # 5. 巡逻兵进行曲 - 弗兰克·米查姆 - bE大调 - 高 - 欢乐
-american_patrol = Melody("#D4 - #D4 - #D4 D4 #D4 F4 "
-                         "G4 - G4 - G4 #F4 G4 #G4 "
-                         "#A4 - #A4 - #A4 A4 #A4 #D5 "
-                         "#A4 - - - - - - - ".split())
+_SOURCES['american_patrol'] = ("#D4 - #D4 - #D4 D4 #D4 F4 "
+                               "G4 - G4 - G4 #F4 G4 #G4 "
+                               "#A4 - #A4 - #A4 A4 #A4 #D5 "
+                               "#A4 - - - - - - - ".split())
 
 # 6. 拉德斯基进行曲 - 老约翰·施特劳斯 - C大调 - 高 - 欢乐
-radetzky_march = Melody("C5 0 C5 B4 C5 0 C5 B4 "
-                        "C5 0 B4 0 A4 0 C5 B4 "
-                        "C5 0 C5 B4 C5 0 C5 B4 "
-                        "C5 0 G5 0 F5 0 ".split())
+_SOURCES['radetzky_march'] = ("C5 0 C5 B4 C5 0 C5 B4 "
+                              "C5 0 B4 0 A4 0 C5 B4 "
+                              "C5 0 C5 B4 C5 0 C5 B4 "
+                              "C5 0 G5 0 F5 0 ".split())
 
 # 7. 天鹅湖第二幕开场 - 柴可夫斯基 - C大调（已转） - 低 - 悲伤
-ewan_lake_second = Melody("E5 - - - - - - - "
-                          "A4 - B4 - C5 - D5 - "
-                          "E5 - - - C5 - E5 - "
-                          "- - C5 - E5 - - - "
-                          "A4 - C5 - A4 - E4 - "
-                          "C5 - A4 - - - - -".split())
+_SOURCES['ewan_lake_second'] = ("E5 - - - - - - - "
+                                "A4 - B4 - C5 - D5 - "
+                                "E5 - - - C5 - E5 - "
+                                "- - C5 - E5 - - - "
+                                "A4 - C5 - A4 - E4 - "
+                                "C5 - A4 - - - - -".split())
 
 # 8. 生日快乐歌 - C大调 - 中 - 欢乐
-happy_birthday = Melody("G4 G4 A4 - G4 - C5 - "
-                        "B4 - - - G4 G4 A4 - "
-                        "G4 - D5 - C5 - - - "
-                        "G4 G4 G5 - E5 - C5 - "
-                        "B4 - A4 - F5 F5 E5 - "
-                        "C5 - D5 - C5 - - - ".split())
+_SOURCES['happy_birthday'] = ("G4 G4 A4 - G4 - C5 - "
+                              "B4 - - - G4 G4 A4 - "
+                              "G4 - D5 - C5 - - - "
+                              "G4 G4 G5 - E5 - C5 - "
+                              "B4 - A4 - F5 F5 E5 - "
+                              "C5 - D5 - C5 - - - ".split())
 
 # 9. night theme - PVZ - C大调（有点升降音）- 中 - 悲伤
-night_theme_PVZ = Melody("C5 -  A4 - - - B4 - "
-                         "A4 - E4 - F4 - F4 - "
-                         "E4 - A4 - #D4 E4 #G4 - "
-                         "A4 - - - - - - -".split())
+_SOURCES['night_theme_PVZ'] = ("C5 -  A4 - - - B4 - "
+                               "A4 - E4 - F4 - F4 - "
+                               "E4 - A4 - #D4 E4 #G4 - "
+                               "A4 - - - - - - -".split())
 
 # 10. 格兰瓦尔 - 塔雷加 - C大调 - 中 - 平静
-gran_vals = Melody("G5 F5 A4 - B4 - E5 D5 "
-                   "F4 - G4 - D5 C5 E4 - "
-                   "G4 - C5 - - - - -".split())
+_SOURCES['gran_vals'] = ("G5 F5 A4 - B4 - E5 D5 "
+                         "F4 - G4 - D5 C5 E4 - "
+                         "G4 - C5 - - - - -".split())
 
 # 11. 妈妈你听我说 - 德彪西 - C大调 - 中 - 平静
-little_star = Melody(
+_SOURCES['little_star'] = (
     "C4 - C4 - G4 - G4 - "
     "A4 - A4 - G4 - - - "
     "F4 - F4 - E4 - E4 - "
@@ -91,7 +98,7 @@ little_star = Melody(
 )
 
 # 12.  subconscious - maki - C大调 - 少 - 悲伤
-subconscious = Melody(
+_SOURCES['subconscious'] = (
     "A4 - - - E5 - D5 - "
     "C5 - B4 - A4 - - - "
     "- E5 D5 - C5 - B4 - "
@@ -102,7 +109,7 @@ subconscious = Melody(
 )
 
 # 13. geodash theme - GEODASH - C大调 - 高 - 欢乐
-geodash_theme = Melody(
+_SOURCES['geodash_theme'] = (
     "C4 G4 C4 G4 C4 G4 C4 G4 "
     "G3 D4 G3 D4 G3 D4 G3 D4 "
     "A3 E4 A3 E4 A3 E4 A3 E4 "
@@ -111,7 +118,7 @@ geodash_theme = Melody(
 )
 
 # 14. surfing down - unknown - C大调 - 高 - 欢乐
-surfing_down = Melody(
+_SOURCES['surfing_down'] = (
     "G4 - G4 - G4 F4 E4 F4 "
     "G4 - A4 G4 - D4 - - "
     "C4 - C4 - C4 B3 C4 D4 "
@@ -124,7 +131,7 @@ surfing_down = Melody(
 
 
 # 15. undertale - Toby Fox - C大调 - 中 - 平静
-undertale = Melody(
+_SOURCES['undertale'] = (
     "C4 - G4 - F4 - C4 - "
     "E4 - - E4 - - F4 - "
     "0 0 C4 - F4 - C4 - "
@@ -136,7 +143,7 @@ undertale = Melody(
 )
 
 # 16. snowy town - Toby Fox - C大调 - 中 - 平静
-snowy_town = Melody(
+_SOURCES['snowy_town'] = (
     "G4 - G4 - G4 - G4 - "
     "F4 - E4 - F4 - G4 - "
     "- - C5 - - G4 - - "
@@ -148,7 +155,7 @@ snowy_town = Melody(
 )
 
 # 17. 菊次郎的夏天 - C大调 - 中 - 欢乐
-summer = Melody(
+_SOURCES['summer'] = (
     "G4 C5 D5 E5 D5 - C5 C5 "
     "- - - - 0 0 0 0 "
     "G4 C5 D5 E5 D5 - C5 D5 "
@@ -160,7 +167,7 @@ summer = Melody(
 )
 
 # 18. 梦中的婚礼 - C大调 - 高 - 平静
-dreaming_wedding = Melody(
+_SOURCES['dreaming_wedding'] = (
     "A4 A4 B4 B4 C5 C5 B4 B4 "
     "A4 A4 E4 E4 C4 C4 A3 A3 "
     "G4 G4 F4 F4 E4 F4 G4 F4 "
@@ -170,7 +177,7 @@ dreaming_wedding = Melody(
 )
 
 # 19. 起风了前奏 - C大调 - 高 - 平静
-wind_blowing = Melody(
+_SOURCES['wind_blowing'] = (
     "B4 C5 D5 E5 - G4 G5 E5 "
     "- - - - 0 0 0 0 "
     "B4 C5 D5 E5 - G4 G5 E5 "
@@ -178,7 +185,7 @@ wind_blowing = Melody(
 )
 
 # 20. 两只老虎 - C大调 - 中 - 欢乐
-two_tigers = Melody(
+_SOURCES['two_tigers'] = (
     "C4 - D4 - E4 - C4 - "
     "C4 - D4 - E4 - C4 - "
     "E4 - F4 - G4 - - - "
@@ -190,7 +197,7 @@ two_tigers = Melody(
 )
 
 # 21. 贝加尔胡畔 - C大调 - 中 - 悲伤
-lake_bank = Melody(
+_SOURCES['lake_bank'] = (
     "0 0 A3 B3 C4 - G4 - "
     "F4 - - - - - - - "
     "0 0 G3 A3 B3 - F4 - "
@@ -202,7 +209,7 @@ lake_bank = Melody(
 )
 
 # 22. 圣诞快乐，劳伦斯先生 - C大调 - 中 - 悲伤
-merry_christmas_mr_lawrence = Melody(
+_SOURCES['merry_christmas_mr_lawrence'] = (
     "D4 E4 D4 A3 D4 - - - "
     "0 0 D4 E4 D4 E4 G4 E4 "
     "D4 E4 D4 A3 C4 - - - "
@@ -210,7 +217,7 @@ merry_christmas_mr_lawrence = Melody(
 )
 
 # 23. river flows in you - C大调 - 中 - 悲伤
-river_flows_in_you = Melody(
+_SOURCES['river_flows_in_you'] = (
     "C5 - B4 C5 - C4 B4 C5 "
     "- C4 G4 C5 - C4 F4 C4 "
     "E4 - F4 - G4 - E4 - "
@@ -222,7 +229,7 @@ river_flows_in_you = Melody(
 )
 
 # 24. 漠河舞厅 - C大调 - 中 - 悲伤
-desert_river_hall = Melody(
+_SOURCES['desert_river_hall'] = (
     "G4 - G4 - G4 - A4 B4 "
     "0 0 E4 - E4 - B4 - "
     "D5 - C5 - C5 - B4 C5 "
@@ -234,48 +241,66 @@ desert_river_hall = Melody(
 )
 
 # 25. 富士山下前奏 - C大调 - 中 - 平静
-under_Fuji = Melody(
+_SOURCES['under_Fuji'] = (
     "C5 B4 A4 G4 A4 G4 E4 D4 "
     "E4 D4 C4 B3 C4 B3 A3 G3 "
     "A3 - B3 C4 D4 - E4 G4 "
     "G4 - E4 - - - - -".split()
 )
 
-all_melody = [
-    ode_an_die_freude, seasons_spring_the_first,
-    d_major_canon, twelve_tone_equal_temperament,
-    american_patrol, radetzky_march,
-    ewan_lake_second, happy_birthday,
-    happy_birthday, gran_vals,
-    little_star, subconscious,
-    geodash_theme, surfing_down,
-    undertale, snowy_town,
-    summer, dreaming_wedding,
-    wind_blowing, two_tigers,
-    lake_bank, merry_christmas_mr_lawrence,
-    river_flows_in_you, desert_river_hall,
-    under_Fuji
+_GROUPS['all_melody'] = [
+    'ode_an_die_freude', 'seasons_spring_the_first',
+    'd_major_canon', 'twelve_tone_equal_temperament',
+    'american_patrol', 'radetzky_march',
+    'ewan_lake_second', 'happy_birthday',
+    'happy_birthday', 'gran_vals',
+    'little_star', 'subconscious',
+    'geodash_theme', 'surfing_down',
+    'undertale', 'snowy_town',
+    'summer', 'dreaming_wedding',
+    'wind_blowing', 'two_tigers',
+    'lake_bank', 'merry_christmas_mr_lawrence',
+    'river_flows_in_you', 'desert_river_hall',
+    'under_Fuji'
 ]
 
-simple_melody = [
-    ode_an_die_freude, seasons_spring_the_first,
-    ewan_lake_second, happy_birthday,
-    night_theme_PVZ, gran_vals,
-    little_star, undertale,
-    snowy_town, summer,
-    two_tigers, lake_bank,
-    merry_christmas_mr_lawrence, desert_river_hall,
-    under_Fuji
+_GROUPS['simple_melody'] = [
+    'ode_an_die_freude', 'seasons_spring_the_first',
+    'ewan_lake_second', 'happy_birthday',
+    'night_theme_PVZ', 'gran_vals',
+    'little_star', 'undertale',
+    'snowy_town', 'summer',
+    'two_tigers', 'lake_bank',
+    'merry_christmas_mr_lawrence', 'desert_river_hall',
+    'under_Fuji'
 ]
 
-complex_melody = [
-    d_major_canon, twelve_tone_equal_temperament,
-    american_patrol, radetzky_march,
-    geodash_theme, surfing_down,
-    dreaming_wedding, wind_blowing
+_GROUPS['complex_melody'] = [
+    'd_major_canon', 'twelve_tone_equal_temperament',
+    'american_patrol', 'radetzky_march',
+    'geodash_theme', 'surfing_down',
+    'dreaming_wedding', 'wind_blowing'
 ]
 
+
+
+def __getattr__(name: str) -> Melody | List[Melody]:
+    """Build a melody (or a list of melodies) on first access, then keep it in the module."""
+    if name in _SOURCES:
+        value = Melody(_SOURCES[name])
+    elif name in _GROUPS:
+        value = [globals()[n] if n in globals() else __getattr__(n) for n in _GROUPS[name]]
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted([*globals(), *_SOURCES, *_GROUPS])
+
+
 if __name__ == '__main__':
-    midi = american_patrol
+    midi = __getattr__('american_patrol')
     save_midi(midi, "./tmp.mid")
     play_midi("./tmp.mid")
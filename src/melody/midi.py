@@ -1,7 +1,94 @@
-import pygame
-from mido import Message, MetaMessage, MidiFile, MidiTrack
-from typing import List
-from .music import Note, Melody, get_tonality
+import io, os, struct
+import numpy as np
+from typing import Iterable, Iterator, List, Sequence
+from .music import Note, Melody, get_tonality, note_ids
+from .population import Population
+
+
+# Number of sharps (negative for flats) and minor flag of every key signature
+KEY_SIGNATURES = {
+    **{key: (sharps, 0) for sharps, key in enumerate(
+        ['Cb', 'Gb', 'Db', 'Ab', 'Eb', 'Bb', 'F', 'C', 'G', 'D', 'A', 'E', 'B', 'F#', 'C#'], -7)},
+    **{key: (sharps, 1) for sharps, key in enumerate(
+        ['Abm', 'Ebm', 'Bbm', 'Fm', 'Cm', 'Gm', 'Dm', 'Am', 'Em', 'Bm', 'F#m', 'C#m', 'G#m',
+         'D#m', 'A#m'], -7)},
+}
+
+
+def _variable_int(value: int) -> bytes:
+    """Variable-length quantity of Standard MIDI Files."""
+    result = [value & 0x7f]
+    value >>= 7
+    while value:
+        result.append(0x80 | (value & 0x7f))
+        value >>= 7
+    return bytes(reversed(result))
+
+
+def encode_midi(
+    melody: Melody | Sequence[Note | int | str] | np.ndarray,
+    *,
+    instrument: int = 0,
+    velocity: int = 64,
+    time: int = 240,
+    tonality: str | None = None,
+) -> bytes:
+    """
+    Content of the midi file of a melody, the same bytes as `mido` would write for the
+    events below, but without building any `mido` object.
+
+    Parameters are the same as `save_midi`. `melody` can also be an array of note ids.
+
+    Raises
+    ------
+    `ValueError`
+        if melody is not convertable to Melody, or a parameter is out of range.
+    """
+    if not 0 <= instrument <= 127:
+        raise ValueError(f"Expected instrument in [0, 127], given {instrument}")
+    if not 0 <= velocity <= 127:
+        raise ValueError(f"Expected velocity in [0, 127], given {velocity}")
+    if not isinstance(time, int) or not 0 < 2 * time < 2**15:
+        raise ValueError(f"Expected time: int in [1, 16383], given {time}")
+    if tonality is not None and tonality not in KEY_SIGNATURES:
+        raise ValueError(f"Unknown tonality {tonality}, expected one of {list(KEY_SIGNATURES)}")
+    ids = note_ids(melody)
+
+    track = bytearray(b'\x00\xc0')  # program_change
+    track.append(instrument)
+    track += b'\x00\xff\x58\x04\x04\x02\x18\x08'  # time_signature 4/4
+    if tonality is not None:
+        sharps, minor = KEY_SIGNATURES[tonality]
+        track += b'\x00\xff\x59\x02' + bytes((sharps & 0xff, minor))
+
+    length: int = len(ids)
+    i: int = 0
+    pause: int = 0
+    while i < length:
+        if ids[i] == 0:
+            pause += 1
+            i += 1
+            while i < length and ids[i] == Note.NUM + 1:
+                pause += 1
+                i += 1
+        elif 1 <= ids[i] <= Note.NUM:
+            note: int = ids[i] + 52
+            duration: int = 1
+            i += 1
+            while i < length and ids[i] == Note.NUM + 1:
+                duration += 1
+                i += 1
+            track += _variable_int(time * pause)
+            track += bytes((0x90, note, velocity))
+            track += _variable_int(time * duration)
+            track += bytes((0x80, note, velocity))
+            pause = 0
+        else:
+            raise ValueError(f"argument melody: invalid melody[{i}] = {ids[i]}")
+    track += _variable_int(time * pause) + b'\xff\x2f\x00'  # end_of_track
+
+    header = struct.pack('>4sIhhh', b'MThd', 6, 1, 1, 2 * time)
+    return header + struct.pack('>4sI', b'MTrk', len(track)) + bytes(track)
 
 
 def save_midi(
@@ -41,49 +128,80 @@ def save_midi(
     `ValueError`
         if melody is not convertable to Melody.
     """
-    if not isinstance(melody, Melody):
-        melody = Melody(melody)
+    data = encode_midi(melody, instrument=instrument, velocity=velocity, time=time,
+                       tonality=tonality)
+    with open(path, 'wb') as file:
+        file.write(data)
 
-    mid = MidiFile()
-    track = MidiTrack()
-    mid.ticks_per_beat = 2 * time
-    mid.tracks.append(track)
 
-    track.append(Message('program_change', program=instrument))
-    track.append(MetaMessage('time_signature', numerator=4, denominator=4))
-    if tonality is not None:
-        track.append(MetaMessage('key_signature', key=tonality))
+def export_midi(
+    melodies: Iterable[Melody | Sequence[Note | int | str] | np.ndarray],
+    destination: str,
+    *,
+    names: Iterable[str] | None = None,
+    **options,
+) -> List[str]:
+    """
+    Save many melodies at once, with `encode_midi`.
+
+    Parameters
+    ----------
+    `melodies` : `Iterable[Melody]`
+        The melodies, e.g. a list, a `Population` or a 2-D array of note ids.
+    `destination` : `str`
+        A directory (created if needed), or an archive if it ends with `.zip`, `.tar`,
+        `.tar.gz`, `.tgz`, `.tar.bz2` or `.tar.xz`.
+    `names` : `Iterable[str]`, optional
+        File names of the melodies.
+        By default `None`, i.e. `0.mid`, `1.mid`...
+    `options`
+        Keyword arguments of `encode_midi` (`instrument`, `velocity`, `time`, `tonality`).
+
+    Returns
+    -------
+    The file names, in order.
+    """
+    import tarfile, zipfile
+    if isinstance(melodies, Population):
+        melodies = melodies.data
+    files = ((name, encode_midi(melody, **options))
+             for name, melody in zip(names if names is not None else _default_names(), melodies))
+    written = []
+    lower = destination.lower()
+    if lower.endswith('.zip'):
+        with zipfile.ZipFile(destination, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for name, data in files:
+                archive.writestr(name, data)
+                written.append(name)
+    elif lower.endswith(('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tar.xz')):
+        mode = 'w' if lower.endswith('.tar') else 'w:' + (
+            'gz' if lower.endswith(('.gz', '.tgz')) else lower.rsplit('.', 1)[1])
+        with tarfile.open(destination, mode) as archive:
+            for name, data in files:
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                archive.addfile(info, io.BytesIO(data))
+                written.append(name)
+    else:
+        os.makedirs(destination, exist_ok=True)
+        for name, data in files:
+            with open(os.path.join(destination, name), 'wb') as file:
+                file.write(data)
+            written.append(name)
+    return written
 
-    length: int = len(melody)
-    i: int = 0
-    pause: int = 0
-    while i < length:
-        if melody[i].id == 0:
-            pause += 1
-            i += 1
-            while i < length and melody[i].id == Note.NUM + 1:
-                pause += 1
-                i += 1
-        elif 1 <= melody[i].id <= Note.NUM:
-            note: int = melody[i].id + 52
-            duration: int = 1
-            i += 1
-            while i < length and melody[i].id == Note.NUM + 1:
-                duration += 1
-                i += 1
-            track.append(Message('note_on', note=note, velocity=velocity, time=time * pause))
-            track.append(Message('note_off', note=note, velocity=velocity, time=time * duration))
-            pause = 0
-        else:
-            raise ValueError(f"argument melody: invalid melody[{i}] = {melody[i]}")
 
-    track.append(MetaMessage('end_of_track', time=time * pause))
-    mid.save(path)
+def _default_names() -> Iterator[str]:
+    i = 0
+    while True:
+        yield f'{i}.mid'
+        i += 1
 
 
 def read_midi(path: str) -> Melody:
     """parse a midi file into Melody.
     """
+    from mido import MidiFile
     file = MidiFile(path, type=0)
     track = file.tracks[0]
     eight_note = file.ticks_per_beat / 2
@@ -124,6 +242,7 @@ def play_midi(path: str, *, volume: float = 1.0) -> None:
         Volume of music, ranging from 0.0 to 1.0.
         Any number larger than 1.0 will be considered as 1.0
     """
+    import pygame  # slow, so only imported when playing
     pygame.mixer.init()
     clock = pygame.time.Clock()
     pygame.mixer.music.load(path)
@@ -1,5 +1,7 @@
-from typing import List, Sequence, Optional, overload, Iterator, Tuple
+from typing import List, Sequence, Optional, overload, Iterator, Tuple, Dict
 from typing_extensions import Self
+from functools import lru_cache
+import numpy as np
 import random
 
 
@@ -16,18 +18,20 @@ class Note:
         "-"
     ]
     NUM = 27
+    NAME_TO_ID = {name: id for id, name in enumerate(NAME_LIST)}
+    # shared read-only instances, see `Note.of`
+    _INTERNED: List['Note']
     # private
     __id: int
+    __interned: bool = False
 
     def __init__(self, note: Self | str | int) -> None:
         if isinstance(note, Note):
             self.__id = note.__id
         elif isinstance(note, str):
-            for (id, name) in enumerate(Note.NAME_LIST):
-                if note == name:
-                    self.__id = id
-                    break
-            else:
+            try:
+                self.__id = Note.NAME_TO_ID[note]
+            except KeyError:
                 raise ValueError(f"Invalid note name: {note}")
         elif isinstance(note, int):
             if not 0 <= note <= 28:
@@ -36,12 +40,32 @@ class Note:
         else:
             raise ValueError(f"Can not convert {type(note)} to note")
 
+    @classmethod
+    def of(cls, note: Self | str | int) -> 'Note':
+        """
+        The shared instance of a note. There is only one such instance per id, so no
+        allocation happens. Shared instances are read-only: setting their `id` raises,
+        and `+=` returns a new note. Notes built by `Note(...)` remain mutable.
+        """
+        if isinstance(note, Note):
+            return cls._INTERNED[note.__id]
+        elif isinstance(note, int) and 0 <= note <= Note.NUM + 1:
+            return cls._INTERNED[note]
+        return cls._INTERNED[Note(note).__id]
+
     @property
     def id(self) -> int:
         return self.__id
 
+    @property
+    def shared(self) -> bool:
+        """Whether this note is a read-only shared instance of `Note.of`."""
+        return self.__interned
+
     @id.setter
     def id(self, id: int) -> None:
+        if self.__interned:
+            raise ValueError(f"Can not modify shared note {self}, use Note({self.__id}) instead")
         if not isinstance(id, int):
             raise ValueError(f"Expected int, given {type(id)}")
         if not 0 <= id <= Note.NUM + 1:
@@ -59,6 +83,8 @@ class Note:
     def __iadd__(self, delta: int) -> Self:
         if not isinstance(delta, int):
             raise ValueError(f"expected int, given {type(delta)}")
+        if self.__interned:
+            return Note.of(self.__id + delta)
         self.__id += delta
         return self
 
@@ -83,28 +109,73 @@ class Note:
         else:
             raise ValueError(f"invalid argument type: {type(other)}")
 
+    def __repr__(self):
+        return f"Note({Note.NAME_LIST[self.__id]!r})"
+
+    @staticmethod
+    def _intern() -> None:
+        Note._INTERNED = [Note(id) for id in range(Note.NUM + 2)]
+        for note in Note._INTERNED:
+            note.__interned = True
+
+
+Note._intern()
+
 
 class Melody:
     """
     The melody is a simply `list` of `Note`.
+
+    Notes are stored as the shared instances of `Note.of`, so building or copying a
+    melody allocates no notes. They are copied on write: indexing or iterating gives
+    the melody's own mutable notes (copied on first access), so `melody[i].id = x` and
+    `note += k` change the melody in place. Use `ids` to read notes without any copy.
     """
     __data: List[Note]
+    __owned: bool  # whether no note of `__data` is shared
 
-    def __init__(self, data: Self | Sequence[Note | int | str]) -> None:
-        if isinstance(data, (Melody, Sequence)):
-            self.__data = [Note(a) for a in data]
+    def __init__(self, data: Self | 'FrozenMelody' | Sequence[Note | int | str]) -> None:
+        if isinstance(data, Melody):
+            self.__data = [Note.of(a) for a in data.__data]
+        elif isinstance(data, (FrozenMelody, Sequence)):
+            self.__data = [Note.of(a) for a in data]
         else:
             raise ValueError(f"Can not convert {type(data)} to melody")
+        self.__owned = False
+
+    @classmethod
+    def from_ids(cls, ids: Sequence[int] | bytes) -> 'Melody':
+        """
+        Fast path to build a melody from note ids that are already known to be valid
+        (e.g. from a `Population` or a `FrozenMelody`). Ids are NOT checked.
+        """
+        melody = cls.__new__(cls)
+        interned = Note._INTERNED
+        melody.__data = [interned[id] for id in ids]
+        melody.__owned = False
+        return melody
+
+    @property
+    def ids(self) -> List[int]:
+        """Ids of all notes, without copying any note."""
+        return [note.id for note in self.__data]
+
+    def __own(self) -> List[Note]:
+        """Replace shared notes by mutable copies, before notes are given out."""
+        if not self.__owned:
+            self.__data = [Note(note.id) if note.shared else note for note in self.__data]
+            self.__owned = True
+        return self.__data
 
     def pad_or_cut_to(self, length: int) -> 'Melody':
         from math import ceil
         if length <= len(self):
-            return Melody(self[:length])
+            return Melody(self.__data[:length])
         else:
             return Melody((self.__data * ceil(length / len(self)))[:length])
 
     def __iter__(self) -> Iterator[Note]:
-        return iter(self.__data)
+        return iter(self.__own())
 
     def __len__(self) -> int:
         return len(self.__data)
@@ -118,7 +189,7 @@ class Melody:
         ...
 
     def __getitem__(self, index: int | slice) -> Note | List[Note]:
-        return self.__data[index]
+        return self.__own()[index]
 
     @overload
     def __setitem__(self, index: int, value: Note) -> None:
@@ -131,18 +202,118 @@ class Melody:
     def __setitem__(self, index: int | slice, value: Note | List[Note]) -> None:
         if isinstance(index, int) and isinstance(value, Note):
             self.__data[index] = value
+            self.__owned = self.__owned and not value.shared
         elif isinstance(index, slice) and isinstance(value, list):
             for i, val in zip(range(*index.indices(len(self.__data))), value):
                 self.__data[i] = val
+                self.__owned = self.__owned and not val.shared
 
     def __str__(self) -> str:
         return str([str(note) for note in self.__data])
 
     def __eq__(self, other: Self) -> bool:
+        if isinstance(other, FrozenMelody):
+            return other == self
         if not isinstance(other, Melody):
             raise ValueError(f"expected Melody, given {type(other)}")
         return all(a.id == b.id for a, b in zip(self.__data, other.__data))
 
+    def freeze(self) -> 'FrozenMelody':
+        return FrozenMelody(self)
+
+
+class FrozenMelody:
+    """
+    An immutable and hashable melody, stored as `bytes` of note ids (one byte per note).
+    Unlike `Melody`, two frozen melodies are equal iff they have the same length and
+    notes, so they can be used as dict keys or set members, and pickle to a few bytes.
+    """
+    __slots__ = ('__data', '__hash')
+    __data: bytes
+    __hash: int | None
+
+    def __init__(
+        self,
+        data: Self | Melody | bytes | bytearray | memoryview | Sequence[Note | int | str],
+    ) -> None:
+        if isinstance(data, FrozenMelody):
+            self.__data = data.__data
+        elif isinstance(data, (bytes, bytearray, memoryview)):
+            self.__data = bytes(data)
+            if self.__data and max(self.__data) > Note.NUM + 1:
+                raise ValueError(f"Expect note in [0, 28], given {max(self.__data)}")
+        elif isinstance(data, Melody):
+            self.__data = bytes(data.ids)
+        elif isinstance(data, Sequence) and not isinstance(data, str):
+            self.__data = bytes(Note(a).id for a in data)
+        else:
+            raise ValueError(f"Can not convert {type(data)} to frozen melody")
+        self.__hash = None
+
+    @property
+    def data(self) -> bytes:
+        return self.__data
+
+    def to_melody(self) -> Melody:
+        return Melody.from_ids(self.__data)
+
+    def __iter__(self) -> Iterator[Note]:
+        return (Note._INTERNED[id] for id in self.__data)
+
+    def __len__(self) -> int:
+        return len(self.__data)
+
+    @overload
+    def __getitem__(self, index: int) -> Note:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> 'FrozenMelody':
+        ...
+
+    def __getitem__(self, index: int | slice) -> Note | Self:
+        if isinstance(index, slice):
+            result = FrozenMelody.__new__(FrozenMelody)
+            result.__data = self.__data[index]
+            result.__hash = None
+            return result
+        return Note._INTERNED[self.__data[index]]
+
+    def __hash__(self) -> int:
+        if self.__hash is None:
+            self.__hash = hash(self.__data)
+        return self.__hash
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, FrozenMelody):
+            return self.__data == other.__data
+        elif isinstance(other, Melody):
+            return len(self) == len(other) and list(self.__data) == other.ids
+        return NotImplemented
+
+    def __reduce__(self):
+        return (FrozenMelody, (self.__data,))
+
+    def __str__(self) -> str:
+        return str([Note.NAME_LIST[id] for id in self.__data])
+
+    def __repr__(self) -> str:
+        return f"FrozenMelody({self.__data!r})"
+
+
+def note_ids(melody: Melody | FrozenMelody | Sequence[Note | int | str] | np.ndarray) -> List[int]:
+    """
+    Ids of all notes of a melody, given as a `Melody`, a `FrozenMelody`, a sequence of
+    notes (or their names or ids), or an array of note ids. Arrays are NOT checked.
+    """
+    if isinstance(melody, np.ndarray):
+        return melody.tolist()
+    if isinstance(melody, FrozenMelody):
+        return list(melody.data)
+    if not isinstance(melody, Melody):
+        melody = Melody(melody)
+    return melody.ids
+
 
 class Tonality:
     """
@@ -265,11 +436,24 @@ TONALITY = {
 }
 
 
-def get_tonality(melody: Melody, mode: List[str] | str) -> Tuple[float, str | None]:
+class TonalityIndex:
     """
-    mode: str or List[str], such as "major", "minor", "C harmonic", "#A major", ...
+    Precompiled tonalities of a mode, see `compile_tonality`.
+    `masks[k, id]` is `1` iff note `id` belongs to tonality `keys[k]`.
     """
+    keys: List[str]
+    masks: np.ndarray
 
+    def __init__(self, tonalities: Dict[str, List[int]]) -> None:
+        self.keys = list(tonalities.keys())
+        self.masks = np.zeros((len(self.keys), Note.NUM + 2), dtype=np.int64)
+        for k, note_list in enumerate(tonalities.values()):
+            self.masks[k, note_list] = 1
+        self.masks.flags.writeable = False
+
+
+@lru_cache(maxsize=None)
+def _compile_tonality(mode: str | Tuple[str, ...]) -> TonalityIndex:
     tonalities = {}
 
     def parse_mode(s: str) -> None:
@@ -288,26 +472,48 @@ def get_tonality(melody: Melody, mode: List[str] | str) -> Tuple[float, str | No
         except KeyError:
             raise ValueError(f"Unknown mode {s}")
 
-    if isinstance(mode, list):
+    if isinstance(mode, tuple):
         for s in mode:
             parse_mode(s)
-    elif isinstance(mode, str):
+    else:
         parse_mode(mode)
+    return TonalityIndex(tonalities)
+
+
+def compile_tonality(mode: List[str] | str) -> TonalityIndex:
+    """
+    Parse `mode` (see `get_tonality`) into a `TonalityIndex`. Results are cached, so
+    every mode is parsed only once.
+    """
+    if isinstance(mode, list):
+        return _compile_tonality(tuple(mode))
+    elif isinstance(mode, str):
+        return _compile_tonality(mode)
     else:
         raise ValueError(f"Expected mode: str | List[str], given {type(mode)}")
 
-    best_count: int = 0  # The number of notes in tonality
-    best_mode: str | None = None  # The style of melody
-    note_id: List[int] = [note.id for note in melody if 1 <= note.id <= Note.NUM]
-    if not note_id:
-        return 0.0, None
 
-    for key, note_list in tonalities.items():
-        count = sum(note in note_list for note in note_id)
-        if count > best_count:
-            best_count, best_mode = count, key
+def get_tonality(melody: Melody, mode: List[str] | str) -> Tuple[float, str | None]:
+    """
+    mode: str or List[str], such as "major", "minor", "C harmonic", "#A major", ...
 
-    return best_count / len(note_id), best_mode
+    Returns the ratio of notes in the best tonality and the name of that tonality.
+    The first tonality (in the order of `mode`) wins ties.
+    """
+    index = compile_tonality(mode)
+    ids = melody.ids if isinstance(melody, Melody) else [note.id for note in melody]
+    histogram = np.bincount(ids, minlength=Note.NUM + 2)
+    histogram[0] = histogram[Note.NUM + 1] = 0
+    total = int(histogram.sum())  # The number of notes
+    if not total:
+        return 0.0, None
+
+    counts = index.masks @ histogram  # The number of notes in every tonality
+    best = int(counts.argmax())
+    best_count = int(counts[best])
+    if not best_count:
+        return 0.0, None
+    return best_count / total, index.keys[best]
 
 
 # 0: Stable, 1: Unstable, 2: Very-Unstable, 3: Not-in-Tonality
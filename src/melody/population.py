@@ -0,0 +1,121 @@
+import numpy as np
+from typing import Iterator, List, Sequence, overload
+from typing_extensions import Self
+from .music import Note, Melody
+
+
+class Population:
+    """
+    A population of melodies sharing the same length. All genomes are stored in one
+    contiguous `uint8` matrix of note ids with shape `(individuals, length)`, so no
+    `Note` object is allocated until a single individual is converted to `Melody`.
+    """
+    __data: np.ndarray
+
+    def __init__(
+        self,
+        data: Self | np.ndarray | Sequence[Melody | Sequence[Note | int | str]],
+        *,
+        length: int | None = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        `data` : `Population | np.ndarray | Sequence[Melody]`
+            Either another population (copied), a 2-D array of note ids, or a sequence
+            of melodies (or anything convertable to `Melody`).
+        `length` : `int`, optional
+            If given, every melody is padded or cut to this length (see
+            `Melody.pad_or_cut_to`). Otherwise all melodies must share the same length.
+
+        Raises
+        ------
+        `ValueError`
+            if data is empty, of inconsistent length or contains invalid notes.
+        """
+        if isinstance(data, Population):
+            array = data.__data.copy()
+        elif isinstance(data, np.ndarray):
+            if data.ndim != 2:
+                raise ValueError(f"Expected 2-D array of note ids, given shape {data.shape}")
+            if data.size and (data.min() < 0 or data.max() > Note.NUM + 1):
+                raise ValueError(f"Expect note in [0, 28], given [{data.min()}, {data.max()}]")
+            array = data.astype(np.uint8)
+        elif isinstance(data, Sequence):
+            melodies = [Melody(m) for m in data]
+            if length is not None:
+                melodies = [m.pad_or_cut_to(length) for m in melodies]
+            if any(len(melody) != len(melodies[0]) for melody in melodies):
+                raise ValueError(f"Inconsistent length for melodies in population, "
+                                 f"given length {[len(m) for m in melodies]}")
+            array = np.array([m.ids for m in melodies], dtype=np.uint8)
+            length = None
+        else:
+            raise ValueError(f"Can not convert {type(data)} to population")
+
+        if len(array) == 0:
+            raise ValueError(f"Empty population")
+        if length is not None and length != array.shape[1]:
+            melodies = [Melody.from_ids(row).pad_or_cut_to(length) for row in array.tolist()]
+            array = np.array([m.ids for m in melodies], dtype=np.uint8)
+        self.__data = np.ascontiguousarray(array)
+
+    @classmethod
+    def empty(cls, size: int, length: int) -> 'Population':
+        """A population of `size` melodies of `length` rests, to be filled in later."""
+        return cls(np.zeros((size, length), dtype=np.uint8))
+
+    @property
+    def data(self) -> np.ndarray:
+        """The underlying `(individuals, length)` matrix of note ids. Not a copy."""
+        return self.__data
+
+    @property
+    def length(self) -> int:
+        """Length of every melody in the population."""
+        return self.__data.shape[1]
+
+    def to_melodies(self) -> List[Melody]:
+        return [Melody.from_ids(row) for row in self.__data.tolist()]
+
+    def take(self, indices: Sequence[int] | np.ndarray) -> 'Population':
+        """A new population made of the given individuals (repetition allowed)."""
+        return Population(self.__data[np.asarray(indices, dtype=np.intp)])
+
+    def copy(self) -> 'Population':
+        return Population(self)
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        return self.__data if dtype is None else self.__data.astype(dtype)
+
+    def __len__(self) -> int:
+        return self.__data.shape[0]
+
+    def __iter__(self) -> Iterator[Melody]:
+        return iter(self.to_melodies())
+
+    @overload
+    def __getitem__(self, index: int) -> Melody:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> 'Population':
+        ...
+
+    def __getitem__(self, index: int | slice) -> Melody | Self:
+        if isinstance(index, (int, np.integer)):
+            return Melody.from_ids(self.__data[index].tolist())
+        elif isinstance(index, slice):
+            return Population(self.__data[index])
+        else:
+            raise ValueError(f"invalid index type: {type(index)}")
+
+    def __setitem__(self, index: int, value: Melody | Sequence[Note | int | str]) -> None:
+        if not isinstance(value, Melody):
+            value = Melody(value)
+        if len(value) != self.length:
+            raise ValueError(f"Expected melody of length {self.length}, given {len(value)}")
+        self.__data[index] = value.ids
+
+    def __str__(self) -> str:
+        return '\n'.join(str(melody) for melody in self)
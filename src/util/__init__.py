@@ -1 +1,4 @@
-from .selection import RouletteSelection, random_interval
+from .selection import RouletteSelection, RouletteSampler, random_interval
+from .selection import SelectionStrategy, RouletteStrategy, TournamentStrategy, RankStrategy, TruncationStrategy
+from .cache import LRUCache
+from .timer import Timers
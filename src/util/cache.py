@@ -0,0 +1,48 @@
+from collections import OrderedDict
+from typing import Generic, Hashable, TypeVar
+
+T = TypeVar('T')
+
+
+class LRUCache(Generic[T]):
+    """
+    A dict with at most `maxsize` items. When full, the least recently used item
+    is evicted. Lookups are counted in `hits` and `misses`.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        if not isinstance(maxsize, int):
+            raise ValueError(f"Expected maxsize: int, given {type(maxsize)}")
+        if maxsize <= 0:
+            raise ValueError(f"Expected maxsize > 0, given {maxsize}")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Hashable, T] = OrderedDict()
+
+    def get(self, key: Hashable, default: T | None = None) -> T | None:
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: T) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
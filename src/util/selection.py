@@ -1,6 +1,9 @@
 import sys
+import math
 import random
-from typing import Tuple
+import numpy as np
+from abc import ABC, abstractmethod
+from typing import Sequence, Tuple
 
 
 class RouletteSelection:
@@ -27,6 +30,124 @@ class RouletteSelection:
         return self._index
 
 
+class RouletteSampler:
+    """
+    Fitness-proportional selection over a fixed list of weights.
+
+    Unlike `RouletteSelection`, the cumulative distribution is built once, in O(n),
+    and every draw then costs O(log n), so drawing k indices costs O(n + k log n).
+    """
+
+    def __init__(self, weights: Sequence[float] | np.ndarray) -> None:
+        weights = np.asarray(weights, dtype=float)
+        if weights.ndim != 1 or len(weights) == 0:
+            raise ValueError(f"Expected non-empty 1-D weights, given shape {weights.shape}")
+        if (weights < 0).any():
+            raise ValueError(f"Expected weights >= 0, given {weights.min()}")
+        self._cumulative = np.cumsum(weights)
+        self._total = self._cumulative[-1]
+
+    def sample(self, k: int, rng: np.random.Generator | None = None) -> np.ndarray:
+        """
+        Draw `k` indices with replacement, with probability proportional to their weights
+        (uniformly if all weights are 0).
+
+        `rng` defaults to a generator seeded from `random`, so results are reproducible
+        with `random.seed`.
+        """
+        rng = _default_rng(rng)
+        n = len(self._cumulative)
+        if self._total <= 0:
+            return rng.integers(0, n, size=k)
+        indices = np.searchsorted(self._cumulative, rng.random(k) * self._total, side='right')
+        return np.minimum(indices, n - 1)
+
+
+def _default_rng(rng: np.random.Generator | None) -> np.random.Generator:
+    return np.random.default_rng(random.getrandbits(64)) if rng is None else rng
+
+
+class SelectionStrategy(ABC):
+    """
+    Chooses parents given the scores of a generation (the larger, the better).
+    Subclasses implement `select`.
+    """
+
+    @abstractmethod
+    def select(
+        self,
+        scores: Sequence[float] | np.ndarray,
+        k: int,
+        rng: np.random.Generator | None = None,
+    ) -> np.ndarray:
+        """
+        Draw `k` indices of parents, with replacement.
+
+        `rng` defaults to a generator seeded from `random`, so results are reproducible
+        with `random.seed`.
+        """
+
+
+class RouletteStrategy(SelectionStrategy):
+    """Fitness-proportional selection. Scores must be non-negative."""
+
+    def select(self, scores, k, rng=None) -> np.ndarray:
+        return RouletteSampler(scores).sample(k, rng)
+
+
+class TournamentStrategy(SelectionStrategy):
+    """
+    Every parent is the best of `size` individuals drawn uniformly, i.e. O(size) per
+    parent. Only the order of scores matters, so scores may be negative.
+    """
+
+    def __init__(self, size: int = 3) -> None:
+        if not isinstance(size, int) or size <= 0:
+            raise ValueError(f"Expected size: int > 0, given {size}")
+        self.size = size
+
+    def select(self, scores, k, rng=None) -> np.ndarray:
+        scores = np.asarray(scores, dtype=float)
+        candidates = _default_rng(rng).integers(0, len(scores), size=(k, self.size))
+        winners = scores[candidates].argmax(axis=1)
+        return candidates[np.arange(k), winners]
+
+
+class RankStrategy(SelectionStrategy):
+    """
+    Linear rank selection: the probability of an individual only depends on its rank.
+    The best one is `pressure` times as likely as average, the worst one `2 - pressure`
+    times, so scaling scores does not change the selection pressure.
+    """
+
+    def __init__(self, pressure: float = 1.5) -> None:
+        if not 1.0 <= pressure <= 2.0:
+            raise ValueError(f"Expected pressure in [1.0, 2.0], given {pressure}")
+        self.pressure = pressure
+
+    def select(self, scores, k, rng=None) -> np.ndarray:
+        scores = np.asarray(scores, dtype=float)
+        n = len(scores)
+        rank = np.empty(n)
+        rank[np.argsort(scores, kind='stable')] = np.arange(n)  # 0 for the worst
+        weights = (2 - self.pressure) + 2 * (self.pressure - 1) * rank / max(n - 1, 1)
+        return RouletteSampler(weights).sample(k, rng)
+
+
+class TruncationStrategy(SelectionStrategy):
+    """Parents are drawn uniformly among the best `ratio` of the individuals."""
+
+    def __init__(self, ratio: float = 0.5) -> None:
+        if not 0.0 < ratio <= 1.0:
+            raise ValueError(f"Expected ratio in (0.0, 1.0], given {ratio}")
+        self.ratio = ratio
+
+    def select(self, scores, k, rng=None) -> np.ndarray:
+        scores = np.asarray(scores, dtype=float)
+        best = np.argsort(-scores, kind='stable')[:max(1, math.ceil(self.ratio * len(scores)))]
+        return best[_default_rng(rng).integers(0, len(best), size=k)]
+
+
 def random_interval(length: int) -> Tuple[int, int]:
     a, b = random.randint(0, length), random.randint(0, length)
     return (a, b) if a < b else (b, a)
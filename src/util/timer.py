@@ -0,0 +1,41 @@
+import time
+from functools import wraps
+from typing import Callable, Dict, TypeVar
+
+F = TypeVar('F', bound=Callable)
+
+
+class Timers:
+    """Accumulated wall-clock time and number of calls, by name."""
+
+    def __init__(self) -> None:
+        self.seconds: Dict[str, float] = {}
+        self.calls: Dict[str, int] = {}
+
+    def add(self, name: str, seconds: float, calls: int = 1) -> None:
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + calls
+
+    def wrap(self, name: str, function: F) -> F:
+        """`function`, but every call is timed under `name`."""
+
+        @wraps(function)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.add(name, time.perf_counter() - start)
+
+        return timed
+
+    def merge(self, other: 'Timers') -> None:
+        for name, seconds in other.seconds.items():
+            self.add(name, seconds, other.calls[name])
+
+    def clear(self) -> None:
+        self.seconds.clear()
+        self.calls.clear()
+
+    def __repr__(self) -> str:
+        return f"Timers({self.seconds})"